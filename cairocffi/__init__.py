@@ -9,13 +9,16 @@
 
 """
 
+import json
 import os
+import pathlib
 import sys
+from array import array
 from contextlib import suppress
 from ctypes.util import find_library
 
 from . import constants
-from .ffi import ffi
+from .ffi import LazyLibrary, ffi, lib
 
 VERSION = __version__ = '1.7.1'
 # supported version of cairo, used to be pycairo version too:
@@ -34,17 +37,72 @@ if dll_directories and hasattr(os, 'add_dll_directory'):
             os.add_dll_directory(path)
 
 
+# Paths of libraries can be given in CAIROCFFI_LIBRARIES, as a
+# semicolon-separated list of "library_name=path" items, such as
+# "cairo=/opt/lib/libcairo.so.2;gobject-2.0=/opt/lib/libgobject-2.0.so.0".
+library_paths = dict(
+    item.split('=', 1) for item in
+    os.getenv('CAIROCFFI_LIBRARIES', '').split(';') if '=' in item)
+
+# Libraries found by find_library are stored in a cache file, as finding them
+# can launch various subprocesses. CAIROCFFI_LIBRARY_CACHE can give another
+# path for this file, or be empty to disable the cache. When it is not set,
+# the path is found in the user cache directory when the cache is used.
+library_cache_path = os.getenv('CAIROCFFI_LIBRARY_CACHE')
+
+
+def _library_cache_path():
+    """Return the path of the library cache file,
+    or None if the cache is disabled or if there's no user cache directory.
+
+    """
+    if library_cache_path is not None:
+        return pathlib.Path(library_cache_path) if library_cache_path else None
+    try:
+        cache_directory = pathlib.Path(
+            os.getenv('XDG_CACHE_HOME') or pathlib.Path.home() / '.cache')
+    except (RuntimeError, OSError, KeyError):
+        # No home directory, for example for users without passwd entry
+        return None
+    return cache_directory / 'cairocffi' / 'libraries.json'
+
+
+def _read_library_cache():
+    """Return the dict of cached library paths, keyed by library name."""
+    path = _library_cache_path()
+    if path:
+        with suppress(OSError, ValueError):
+            cache = json.loads(path.read_text())
+            if isinstance(cache, dict):
+                return cache
+    return {}
+
+
+def _write_library_cache(cache):
+    """Store the dict of library paths, ignoring errors."""
+    path = _library_cache_path()
+    if path:
+        with suppress(OSError):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(cache, indent=2, sort_keys=True))
+
+
 def dlopen(ffi, library_names, filenames):
-    """Try various names for the same library, for different platforms."""
+    """Try various names for the same library, for different platforms.
+
+    Paths given by the ``CAIROCFFI_LIBRARIES`` environment variable are tried
+    first, then paths in the cache, then ``filenames``.
+    :func:`ctypes.util.find_library` is only used when all of them fail.
+
+    """
     exceptions = []
 
-    for library_name in library_names:
-        library_filename = find_library(library_name)
-        if library_filename:
-            filenames = (library_filename, *filenames)
-        else:
-            exceptions.append(
-                'no library called "{}" was found'.format(library_name))
+    cache = _read_library_cache()
+    filenames = (
+        *(library_paths[name] for name in library_names
+          if name in library_paths),
+        *(cache[name] for name in library_names if name in cache),
+        *filenames)
 
     for filename in filenames:
         try:
@@ -52,14 +110,35 @@ def dlopen(ffi, library_names, filenames):
         except OSError as exception:  # pragma: no cover
             exceptions.append(exception)
 
+    for library_name in library_names:  # pragma: no cover
+        library_filename = find_library(library_name)
+        if library_filename:
+            try:
+                library = ffi.dlopen(library_filename)
+            except OSError as exception:
+                exceptions.append(exception)
+            else:
+                cache[library_name] = library_filename
+                _write_library_cache(cache)
+                return library
+        else:
+            exceptions.append(
+                'no library called "{}" was found'.format(library_name))
+
     error_message = '\n'.join(  # pragma: no cover
         str(exception) for exception in exceptions)
     raise OSError(error_message)  # pragma: no cover
 
 
-cairo = dlopen(
-    ffi, ('cairo-2', 'cairo', 'libcairo-2'),
-    ('libcairo.so.2', 'libcairo.2.dylib', 'libcairo-2.dll'))
+# Names and filenames of cairo given to dlopen()
+CAIRO_LIBRARY_NAMES = ('cairo-2', 'cairo', 'libcairo-2')
+CAIRO_FILENAMES = ('libcairo.so.2', 'libcairo.2.dylib', 'libcairo-2.dll')
+
+if lib is not None:  # pragma: no cover
+    # Compiled API-mode bindings, linked to cairo
+    cairo = lib
+else:
+    cairo = LazyLibrary(dlopen(ffi, CAIRO_LIBRARY_NAMES, CAIRO_FILENAMES))
 
 
 class _keepref(object):  # noqa: N801
@@ -100,6 +179,29 @@ def _check_status(status):
         raise exception(message, status)
 
 
+def _as_doubles(values):
+    """Return a flat memoryview of doubles with the content of ``values``.
+
+    ``values`` is a C-contiguous buffer of doubles
+    (such as a NumPy array or an :class:`array.array`) that is not copied,
+    any other buffer or a sequence of numbers or of sequences of numbers.
+
+    """
+    try:
+        view = memoryview(values)
+    except TypeError:
+        view = None
+    else:
+        if view.format == 'd' and view.c_contiguous:
+            return view.cast('B').cast('d')
+        values = view.tolist()
+    if view is None or view.ndim > 1:
+        values = [
+            value for item in values
+            for value in (item if hasattr(item, '__len__') else (item,))]
+    return memoryview(array('d', values))
+
+
 def cairo_version():
     """Return the cairo version number as a single integer,
     such as 11208 for ``1.12.8``.
@@ -132,7 +234,7 @@ def install_as_pycairo():
 
 from .surfaces import (  # noqa isort:skip
     Surface, ImageSurface, PDFSurface, PSSurface, SVGSurface, RecordingSurface,
-    Win32Surface, Win32PrintingSurface)
+    Win32Surface, Win32PrintingSurface, write_many_to_png, encode_png_many)
 try:
     from .xcb import XCBSurface  # noqa isort:skip
 except (ImportError, OSError):
@@ -142,7 +244,9 @@ from .patterns import (  # noqa isort:skip
     RadialGradient)
 from .fonts import (  # noqa isort:skip
     FontFace, ToyFontFace, ScaledFont, FontOptions)
-from .context import Context  # noqa isort:skip
+from .context import Context, Path  # noqa isort:skip
 from .matrix import Matrix  # noqa isort:skip
+from .displaylist import DisplayList  # noqa isort:skip
+from .tiles import render_tiles  # noqa isort:skip
 
 from .constants import *  # noqa isort:skip
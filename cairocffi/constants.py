@@ -1656,42 +1656,6 @@ cairo_pattern_add_color_stop_rgba (cairo_pattern_t *pattern,
 				   double red, double green, double blue,
 				   double alpha);
 
-void
-cairo_mesh_pattern_begin_patch (cairo_pattern_t *pattern);
-
-void
-cairo_mesh_pattern_end_patch (cairo_pattern_t *pattern);
-
-void
-cairo_mesh_pattern_curve_to (cairo_pattern_t *pattern,
-			     double x1, double y1,
-			     double x2, double y2,
-			     double x3, double y3);
-
-void
-cairo_mesh_pattern_line_to (cairo_pattern_t *pattern,
-			    double x, double y);
-
-void
-cairo_mesh_pattern_move_to (cairo_pattern_t *pattern,
-			    double x, double y);
-
-void
-cairo_mesh_pattern_set_control_point (cairo_pattern_t *pattern,
-				      unsigned int point_num,
-				      double x, double y);
-
-void
-cairo_mesh_pattern_set_corner_color_rgb (cairo_pattern_t *pattern,
-					 unsigned int corner_num,
-					 double red, double green, double blue);
-
-void
-cairo_mesh_pattern_set_corner_color_rgba (cairo_pattern_t *pattern,
-					  unsigned int corner_num,
-					  double red, double green, double blue,
-					  double alpha);
-
 void
 cairo_pattern_set_matrix (cairo_pattern_t      *pattern,
 			  const cairo_matrix_t *matrix);
@@ -1757,27 +1721,6 @@ cairo_pattern_get_radial_circles (cairo_pattern_t *pattern,
 				  double *x0, double *y0, double *r0,
 				  double *x1, double *y1, double *r1);
 
-cairo_status_t
-cairo_mesh_pattern_get_patch_count (cairo_pattern_t *pattern,
-				    unsigned int *count);
-
-cairo_path_t *
-cairo_mesh_pattern_get_path (cairo_pattern_t *pattern,
-			     unsigned int patch_num);
-
-cairo_status_t
-cairo_mesh_pattern_get_corner_color_rgba (cairo_pattern_t *pattern,
-					  unsigned int patch_num,
-					  unsigned int corner_num,
-					  double *red, double *green,
-					  double *blue, double *alpha);
-
-cairo_status_t
-cairo_mesh_pattern_get_control_point (cairo_pattern_t *pattern,
-				      unsigned int patch_num,
-				      unsigned int point_num,
-				      double *x, double *y);
-
 void
 cairo_matrix_init (cairo_matrix_t *matrix,
 		   double  xx, double  yx,
@@ -1824,6 +1767,70 @@ void
 cairo_matrix_transform_point (const cairo_matrix_t *matrix,
 			      double *x, double *y);
 
+void
+cairo_debug_reset_static_data (void);
+
+"""
+_CAIRO_MESH_HEADERS = r"""
+void
+cairo_mesh_pattern_begin_patch (cairo_pattern_t *pattern);
+
+void
+cairo_mesh_pattern_end_patch (cairo_pattern_t *pattern);
+
+void
+cairo_mesh_pattern_curve_to (cairo_pattern_t *pattern,
+			     double x1, double y1,
+			     double x2, double y2,
+			     double x3, double y3);
+
+void
+cairo_mesh_pattern_line_to (cairo_pattern_t *pattern,
+			    double x, double y);
+
+void
+cairo_mesh_pattern_move_to (cairo_pattern_t *pattern,
+			    double x, double y);
+
+void
+cairo_mesh_pattern_set_control_point (cairo_pattern_t *pattern,
+				      unsigned int point_num,
+				      double x, double y);
+
+void
+cairo_mesh_pattern_set_corner_color_rgb (cairo_pattern_t *pattern,
+					 unsigned int corner_num,
+					 double red, double green, double blue);
+
+void
+cairo_mesh_pattern_set_corner_color_rgba (cairo_pattern_t *pattern,
+					  unsigned int corner_num,
+					  double red, double green, double blue,
+					  double alpha);
+
+cairo_status_t
+cairo_mesh_pattern_get_patch_count (cairo_pattern_t *pattern,
+				    unsigned int *count);
+
+cairo_path_t *
+cairo_mesh_pattern_get_path (cairo_pattern_t *pattern,
+			     unsigned int patch_num);
+
+cairo_status_t
+cairo_mesh_pattern_get_corner_color_rgba (cairo_pattern_t *pattern,
+					  unsigned int patch_num,
+					  unsigned int corner_num,
+					  double *red, double *green,
+					  double *blue, double *alpha);
+
+cairo_status_t
+cairo_mesh_pattern_get_control_point (cairo_pattern_t *pattern,
+				      unsigned int patch_num,
+				      unsigned int point_num,
+				      double *x, double *y);
+
+"""
+_CAIRO_REGION_HEADERS = r"""
 typedef struct _cairo_region cairo_region_t;
 
 typedef enum _cairo_region_overlap {
@@ -1910,9 +1917,8 @@ cairo_status_t
 cairo_region_xor_rectangle (cairo_region_t *dst,
 			    const cairo_rectangle_int_t *rectangle);
 
-void
-cairo_debug_reset_static_data (void);
-
+"""
+_CAIRO_PDF_HEADERS = r"""
 const int CAIRO_PDF_OUTLINE_ROOT = 0;
 
 
@@ -1987,6 +1993,8 @@ cairo_pdf_surface_set_thumbnail_size (cairo_surface_t *surface,
 
 
 
+"""
+_CAIRO_PS_HEADERS = r"""
 typedef enum _cairo_ps_level {
     CAIRO_PS_LEVEL_2,
     CAIRO_PS_LEVEL_3
@@ -2038,6 +2046,8 @@ cairo_ps_surface_dsc_begin_page_setup (cairo_surface_t *surface);
 
 
 
+"""
+_CAIRO_SVG_HEADERS = r"""
 typedef enum _cairo_svg_version {
     CAIRO_SVG_VERSION_1_1,
     CAIRO_SVG_VERSION_1_2
@@ -2085,6 +2095,8 @@ cairo_svg_surface_set_document_unit (cairo_surface_t	*surface,
 cairo_svg_unit_t
 cairo_svg_surface_get_document_unit (cairo_surface_t	*surface);
 
+"""
+_CAIRO_WIN32_HEADERS = r"""
 
         typedef void* HDC;
         typedef void* HFONT;
@@ -2145,6 +2157,8 @@ void
 cairo_win32_scaled_font_get_device_to_logical (cairo_scaled_font_t *scaled_font,
 					       cairo_matrix_t *device_to_logical);
 
+"""
+_CAIRO_QUARTZ_HEADERS = r"""
 
         typedef void* CGContextRef;
         typedef void* CGFontRef;
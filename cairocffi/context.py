@@ -9,11 +9,22 @@
 
 """
 
-from . import _check_status, _keepref, cairo, constants, ffi
+import re
+import sys
+from array import array
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from itertools import repeat
+from math import ceil, floor
+from operator import add
+
+from . import _as_doubles, _check_status, _keepref, cairo, constants, ffi
+from .displaylist import DisplayList
+from .ffi import lib
 from .fonts import FontFace, FontOptions, ScaledFont, _encode_string
 from .matrix import Matrix
 from .patterns import Pattern
-from .surfaces import Surface
+from .surfaces import ImageSurface, Surface
 
 PATH_POINTS_PER_TYPE = {
     constants.PATH_MOVE_TO: 1,
@@ -22,8 +33,83 @@ PATH_POINTS_PER_TYPE = {
     constants.PATH_CLOSE_PATH: 0
 }
 
+# Segments added for each rectangle, as by cairo_rectangle
+RECTANGLE_PATH_TYPES = (
+    constants.PATH_MOVE_TO, constants.PATH_LINE_TO, constants.PATH_LINE_TO,
+    constants.PATH_LINE_TO, constants.PATH_CLOSE_PATH)
 
-def _encode_path(path_items):
+# Runs of segments of the same type, in byte strings of path types
+PATH_TYPES_RUN = re.compile(rb'(.)\1*', re.DOTALL)
+
+
+def _is_buffer(value):
+    """Return whether ``value`` supports the buffer protocol."""
+    try:
+        memoryview(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _encode_path(path):
+    """Take a path in one of the formats accepted by
+    :meth:`Context.append_path`
+    and return a ``(path, data)`` tuple of cdata object.
+
+    The first cdata object is a ``cairo_path_t *`` pointer
+    that can be used as long as both objects live.
+
+    """
+    if isinstance(path, Path):
+        return path._pointer, path._data
+    elif isinstance(path, tuple) and len(path) == 2 and _is_buffer(path[0]):
+        data = ffi.from_buffer(_pack_path(*path))
+    elif _is_buffer(path):
+        data = ffi.from_buffer(path)
+        _check_path_data(data)
+    else:
+        return _encode_path_items(path)
+    pointer = ffi.new('cairo_path_t *', {
+        'status': constants.STATUS_SUCCESS,
+        'data': ffi.cast('cairo_path_data_t *', data),
+        'num_data': len(data) // ffi.sizeof('cairo_path_data_t')})
+    return pointer, data
+
+
+def _check_path_data(data):
+    """Raise :exc:`ValueError` if the ``data`` buffer is not
+    a valid array of ``cairo_path_data_t``.
+
+    Cairo trusts the types and lengths of the headers: each segment must
+    have the number of points of its type and fit in the buffer.
+
+    """
+    size = ffi.sizeof('cairo_path_data_t')
+    if len(data) % size:
+        raise ValueError(
+            'Expected a multiple of %d bytes, got %d.' % (size, len(data)))
+    slot_ints = size // ffi.sizeof('int')
+    ints = memoryview(ffi.buffer(data)).cast('B').cast('i')
+    types = ints[0::slot_ints]
+    lengths = ints[1::slot_ints]
+    points_per_type = PATH_POINTS_PER_TYPE
+    num_data = len(types)
+    position = 0
+    while position < num_data:
+        path_type = types[position]
+        if path_type not in points_per_type:
+            raise ValueError('Invalid path operation %r at item %d' % (
+                path_type, position))
+        length = lengths[position]
+        if length != 1 + points_per_type[path_type]:
+            raise ValueError('Expected length %d at item %d, got %d.' % (
+                1 + points_per_type[path_type], position, length))
+        position += length
+    if position != num_data:
+        raise ValueError('Expected %d items, got %d.' % (position, num_data))
+
+
+def _encode_path_items(path_items):
     """Take an iterable of ``(path_operation, coordinates)`` tuples
     in the same format as from :meth:`Context.copy_path`
     and return a ``(path, data)`` tuple of cdata object.
@@ -83,6 +169,213 @@ def _iter_path(pointer):
         position += path_data.header.length
 
 
+def _path_types(types):
+    """Return ``types`` as a byte string with one byte per segment.
+
+    ``types`` is a C-contiguous buffer of integers
+    (such as a NumPy array or an :class:`array.array`),
+    converted without creating Python objects for each segment,
+    or any other sequence of integers.
+
+    """
+    try:
+        view = memoryview(types)
+    except TypeError:
+        view = memoryview(array('i', types))
+    if view.format not in 'bBhHiIlLqQ' or not view.c_contiguous:
+        view = memoryview(array('i', view.tolist()))
+    data = view.cast('B')
+    size = view.itemsize
+    low = data[0 if sys.byteorder == 'little' else size - 1::size].tobytes()
+    # Other bytes must be zero for valid path operations
+    if size > 1 and data.tobytes().count(0) - low.count(0) != (
+            (size - 1) * len(low)):
+        raise ValueError('Invalid path operation')
+    return low
+
+
+def _pack_path(types, coordinates):
+    """Return a ``cairo_path_data_t`` buffer for a path
+    given as a ``(types, coordinates)`` pair.
+
+    See :meth:`Context.append_path` for the data structure.
+
+    Types are split in runs, found with operations on byte strings:
+    the whole path when it repeats a short pattern of types
+    (as for rectangles or polygons with the same number of sides),
+    or consecutive segments of the same type.
+
+    """
+    types = _path_types(types)
+    period = types.find(types[:1], 1)
+    count = len(types) // period if period > 0 else 0
+    if 0 < period <= count and types == types[:period] * count:
+        runs = [(tuple(types[:period]), count)]
+    else:
+        runs = [
+            ((match.group()[0],), match.end() - match.start())
+            for match in PATH_TYPES_RUN.finditer(types)]
+    return _pack_runs(runs, coordinates)
+
+
+def _pack_runs(runs, coordinates):
+    """Return a ``cairo_path_data_t`` buffer for a path
+    given as runs of a repeated pattern of types and its coordinates.
+
+    ``runs`` is a list of ``(pattern, count)`` tuples,
+    where ``pattern`` is a tuple of :ref:`PATH_OPERATION` integers.
+    Segments are written with one strided copy for each header field
+    and coordinate of the pattern.
+
+    """
+    points_per_type = PATH_POINTS_PER_TYPE
+    coordinates = _as_doubles(coordinates)
+    length = num_coordinates = 0
+    for pattern, count in runs:
+        for path_type in pattern:
+            if path_type not in points_per_type:
+                raise ValueError('Invalid path operation %r' % path_type)
+            num_points = points_per_type[path_type]
+            length += count * (1 + num_points)  # 1 header + N points
+            num_coordinates += count * 2 * num_points
+    if len(coordinates) != num_coordinates:
+        raise ValueError('Expected %d coordinates, got %d.' % (
+            num_coordinates, len(coordinates)))
+
+    size = ffi.sizeof('cairo_path_data_t')
+    slot_ints = size // ffi.sizeof('int')
+    slot_doubles = size // ffi.sizeof('double')
+    data = bytearray(size * length)
+    ints = memoryview(data).cast('i')
+    doubles = memoryview(data).cast('d')
+    slot = coordinate = 0
+    for pattern, count in runs:
+        pattern_lengths = [1 + points_per_type[type_] for type_ in pattern]
+        pattern_length = sum(pattern_lengths)
+        pattern_coordinates = 2 * (pattern_length - len(pattern))
+        end = slot + pattern_length * count
+        ints_step = pattern_length * slot_ints
+        doubles_step = pattern_length * slot_doubles
+        end_coordinate = coordinate + pattern_coordinates * count
+        for path_type, segment_length in zip(pattern, pattern_lengths):
+            ints[slot * slot_ints:end * slot_ints:ints_step] = (
+                array('i', [path_type]) * count)
+            ints[slot * slot_ints + 1:end * slot_ints:ints_step] = (
+                array('i', [segment_length]) * count)
+            for i in range(2 * (segment_length - 1)):
+                start = (slot + 1 + i // 2) * slot_doubles + i % 2
+                doubles[start:end * slot_doubles:doubles_step] = (
+                    coordinates[
+                        coordinate + i:end_coordinate:pattern_coordinates])
+            slot += segment_length
+            coordinate += 2 * (segment_length - 1)
+        slot = end
+        coordinate = end_coordinate
+    return data
+
+
+def _rectangles_coordinates(rectangles):
+    """Return the coordinates of the segments of ``rectangles``.
+
+    See :meth:`Context.rectangles` for the data structure.
+    Each rectangle is a run of :obj:`RECTANGLE_PATH_TYPES` segments.
+
+    """
+    rectangles = _as_doubles(rectangles)
+    if len(rectangles) % 4:
+        raise ValueError(
+            'Expected a multiple of 4 coordinates, got %d.' % len(rectangles))
+    length = len(rectangles) // 4
+    x, y = rectangles[0::4], rectangles[1::4]
+    right = array('d', map(add, x, rectangles[2::4]))
+    bottom = array('d', map(add, y, rectangles[3::4]))
+    coordinates = array('d', bytes(8 * 8 * length))
+    view = memoryview(coordinates)
+    for i, values in enumerate((x, y, right, y, right, bottom, x, bottom)):
+        view[i::8] = values
+    return coordinates
+
+
+def _unpack_path(data):
+    """Return a ``(types, coordinates)`` pair of arrays
+    for a ``cairo_path_data_t`` buffer.
+
+    See :meth:`Context.append_path` for the data structure.
+
+    """
+    points_per_type = PATH_POINTS_PER_TYPE
+    slot_ints = ffi.sizeof('cairo_path_data_t') // ffi.sizeof('int')
+    ints = memoryview(data).cast('B').cast('i')
+    doubles = memoryview(data).cast('B').cast('d')
+    types = array('i')
+    coordinates = array('d')
+    slot = 0
+    length = len(ints) // slot_ints
+    while slot < length:
+        path_type = ints[slot * slot_ints]
+        types.append(path_type)
+        # Each point fills a cairo_path_data_t item with two doubles
+        start = 2 * (slot + 1)
+        coordinates.extend(
+            doubles[start:start + 2 * points_per_type[path_type]])
+        slot += ints[slot * slot_ints + 1]
+    return types, coordinates
+
+
+class Path(object):
+    """A copy of a path, as returned by :meth:`Context.copy_path`
+    and :meth:`Context.copy_path_flat` when ``as_object`` is true.
+
+    The path data is kept in the memory allocated by cairo,
+    without creating Python objects for its segments.
+    Iterating on a :class:`Path` lazily yields
+    ``(path_operation, coordinates)`` tuples,
+    see :meth:`Context.copy_path` for the data structure.
+
+    A :class:`Path` can be given to :meth:`Context.append_path`
+    without being encoded again.
+
+    """
+    def __init__(self, pointer):
+        destroy = cairo.cairo_path_destroy
+        # The path is destroyed when its data is not used anymore,
+        # including by the views returned by the data attribute.
+        self._pointer = pointer
+        self._data = ffi.gc(
+            pointer.data, _keepref(cairo, lambda _: destroy(pointer)))
+        _check_status(pointer.status)
+
+    def __iter__(self):
+        # Keep a reference to self while iterating
+        yield from _iter_path(self._pointer)
+
+    @property
+    def data(self):
+        """A read-only :class:`memoryview` of bytes
+        on the array of ``cairo_path_data_t`` items of the path.
+
+        The data is not copied,
+        and stays valid as long as the view lives.
+        It can for example be used as a NumPy structured array
+        of headers and points.
+
+        """
+        size = self._pointer.num_data * ffi.sizeof('cairo_path_data_t')
+        return memoryview(ffi.buffer(self._data, size)).toreadonly()
+
+    def as_arrays(self):
+        """Return the segments of the path as arrays.
+
+        :returns:
+            A ``(types, coordinates)`` tuple
+            of an :class:`array.array` of :ref:`PATH_OPERATION` integers
+            and of an :class:`array.array` of the concatenated coordinates
+            of all the segments, as accepted by :meth:`Context.append_path`.
+
+        """
+        return _unpack_path(self.data)
+
+
 class Context(object):
     """A :class:`Context` contains the current state of the rendering device,
     including coordinates of yet to be drawn shapes.
@@ -91,21 +384,187 @@ class Context(object):
     and all drawing with cairo is always done to a :class:`Context` object.
 
     :param target: The target :class:`Surface` object.
+    :type state_cache: bool
+    :param state_cache:
+        Whether values given to setters are cached.
+        With this cache, setting the current value again
+        for the source color, the operator, the antialias, the fill rule,
+        the line cap, join, width and miter limit, or the font size
+        doesn't call cairo,
+        and getters for these values don't call cairo once they are known.
+        The number of calls to cairo skipped by the cache
+        is given by the ``skipped_state_calls`` attribute.
+        Other changes made to the state of the underlying ``cairo_t``
+        outside of this object are not seen by the cache.
+    :param text_extents_cache_size:
+        The size of the cache of :meth:`text_extents`,
+        see :meth:`set_text_extents_cache_size`.
 
     Cairo contexts can be used as Python :ref:`context managers <with>`.
     See :meth:`save`.
 
     """
-    def __init__(self, target):
+    def __init__(self, target, state_cache=False, text_extents_cache_size=0):
         self._init_pointer(cairo.cairo_create(target._pointer))
+        if state_cache:
+            self._state = {}
+        self.set_text_extents_cache_size(text_extents_cache_size)
 
     def _init_pointer(self, pointer):
         self._pointer = ffi.gc(pointer, _keepref(cairo, cairo.cairo_destroy))
-        self._check_status()
+        # Nesting level of deferred_errors()
+        self._deferred_errors = 0
+        self._check_status()
+        # Masks rasterized by stamp(), see _get_stamp()
+        self._stamps = {}
+        # Values of the state cache, None when disabled.
+        # Copies are stacked by save() and push_group().
+        self._state = None
+        self._saved_states = []
+        self.skipped_state_calls = 0
+        # Extents keyed by (scaled font pointer, text), None when disabled.
+        # Scaled fonts used in keys are kept alive in _text_extents_fonts
+        # with their number of keys, so that their address is not reused.
+        self._text_extents_cache = None
+        self._text_extents_cache_size = 0
+        self._text_extents_fonts = {}
+        self.text_extents_cache_hits = 0
+        self.text_extents_cache_misses = 0
+
+    def _state_unchanged(self, name, value):
+        """Return whether the state cache already has ``value`` for ``name``.
+
+        If so, count a skipped call.
+
+        """
+        state = self._state
+        if state is not None and name in state and state[name] == value:
+            self.skipped_state_calls += 1
+            return True
+        return False
+
+    def _get_state(self, name, getter):
+        """Return the cached value for ``name``,
+        or the value returned by ``getter`` that is then cached.
+
+        """
+        if self._state is None:
+            return getter(self._pointer)
+        value = self._state.get(name)
+        if value is None:
+            value = self._state[name] = getter(self._pointer)
+        else:
+            self.skipped_state_calls += 1
+        return value
+
+    def _set_state(self, name, value=None):
+        """Cache ``value`` for ``name``, or forget it if ``value`` is None."""
+        if self._state is not None:
+            if value is None:
+                self._state.pop(name, None)
+            else:
+                self._state[name] = value
+
+    def _save_state(self):
+        """Stack a copy of the state cache."""
+        if self._state is not None:
+            self._saved_states.append(dict(self._state))
+
+    def _restore_state(self):
+        """Restore the last stacked copy of the state cache."""
+        if self._state is not None:
+            self._state = (
+                self._saved_states.pop() if self._saved_states else {})
+
+    def _forget_state(self):
+        """Empty the state cache, after changes made outside of this object."""
+        if self._state is not None:
+            self._state = {}
+            self._saved_states = []
 
     def _check_status(self):
+        if not self._deferred_errors:
+            _check_status(cairo.cairo_status(self._pointer))
+
+    def _check_status_now(self):
         _check_status(cairo.cairo_status(self._pointer))
 
+    @contextmanager
+    def deferred_errors(self):
+        """Return a context manager deferring error checks.
+
+        Cairo errors are sticky: once an error happens,
+        the context keeps its error status and ignores following operations.
+        Inside the ``with`` block, the status is not checked
+        after each call to cairo,
+        but only by drawing operators
+        (such as :meth:`paint`, :meth:`fill`, :meth:`stroke`,
+        :meth:`show_text` and :meth:`show_page`)
+        and at the end of the block.
+        When blocks are nested,
+        only the end of the outermost block checks the status.
+        The same :exc:`CairoError` exceptions are raised,
+        but possibly later than the call causing the error,
+        and values returned by methods called after an error
+        are meaningless.
+
+        This avoids a call to cairo for most methods,
+        such as the ones building paths::
+
+            with context.deferred_errors():
+                for x, y in points:
+                    context.line_to(x, y)
+                context.stroke()
+
+        """
+        self._deferred_errors += 1
+        try:
+            yield self
+        finally:
+            self._deferred_errors -= 1
+        if not self._deferred_errors:
+            self._check_status_now()
+
+    @contextmanager
+    def record(self, display_list=None):
+        """Return a context manager recording drawing operations.
+
+        Inside the ``with`` block,
+        methods of this context are called as usual
+        and recorded in a :class:`DisplayList`,
+        that can then be replayed on other contexts::
+
+            with context.record() as display_list:
+                context.set_source_rgb(1, 0, 0)
+                context.rectangle(10, 10, 20, 20)
+                context.fill()
+            display_list.replay(other_context)
+
+        Methods only returning information
+        (such as :meth:`get_matrix` or :meth:`in_fill`) can be called.
+        Other methods that can't be recorded raise :exc:`ValueError`,
+        see :class:`DisplayList` for the list of recorded operations.
+
+        :param display_list:
+            A :class:`DisplayList` to append operations to,
+            or :obj:`None` to record in a new one.
+        :returns:
+            A context manager yielding the :class:`DisplayList`.
+
+        """
+        if display_list is None:
+            display_list = DisplayList()
+        recorders = display_list._recorders(self)
+        attributes = vars(self)
+        if any(name in attributes for name in recorders):
+            raise ValueError('Context is already recording')
+        attributes.update(recorders)
+        try:
+            yield display_list
+        finally:
+            for name in recorders:
+                del attributes[name]
+
     @classmethod
     def _from_pointer(cls, pointer, incref):
         """Wrap an existing ``cairo_t *`` cdata pointer.
@@ -166,6 +625,7 @@ class Context(object):
         """
         cairo.cairo_save(self._pointer)
         self._check_status()
+        self._save_state()
 
     def restore(self):
         """Restores the context to the state saved
@@ -175,6 +635,7 @@ class Context(object):
         """
         cairo.cairo_restore(self._pointer)
         self._check_status()
+        self._restore_state()
 
     def __enter__(self):
         self.save()
@@ -231,6 +692,7 @@ class Context(object):
         """
         cairo.cairo_push_group(self._pointer)
         self._check_status()
+        self._save_state()
 
     def push_group_with_content(self, content):
         """Temporarily redirects drawing to an intermediate surface
@@ -252,6 +714,7 @@ class Context(object):
         """
         cairo.cairo_push_group_with_content(self._pointer, content)
         self._check_status()
+        self._save_state()
 
     def pop_group(self):
         """Terminates the redirection begun by a call to :meth:`push_group`
@@ -270,8 +733,10 @@ class Context(object):
             performed to the group.
 
         """
-        return Pattern._from_pointer(
+        pattern = Pattern._from_pointer(
             cairo.cairo_pop_group(self._pointer), incref=False)
+        self._restore_state()
+        return pattern
 
     def pop_group_to_source(self):
         """Terminates the redirection begun by a call to :meth:`push_group`
@@ -286,6 +751,8 @@ class Context(object):
         """
         cairo.cairo_pop_group_to_source(self._pointer)
         self._check_status()
+        self._restore_state()
+        self._set_state('source')
 
     def get_group_target(self):
         """Returns the current destination surface for the context.
@@ -327,16 +794,24 @@ class Context(object):
         :type alpha: float
 
         """
+        color = (red, green, blue, alpha)
+        if self._state_unchanged('source', color):
+            return
         cairo.cairo_set_source_rgba(self._pointer, red, green, blue, alpha)
         self._check_status()
+        self._set_state('source', color)
 
     def set_source_rgb(self, red, green, blue):
         """Same as :meth:`set_source_rgba` with alpha always 1.
         Exists for compatibility with pycairo.
 
         """
+        color = (red, green, blue, 1)
+        if self._state_unchanged('source', color):
+            return
         cairo.cairo_set_source_rgb(self._pointer, red, green, blue)
         self._check_status()
+        self._set_state('source', color)
 
     def set_source_surface(self, surface, x=0, y=0):
         """This is a convenience method for creating a pattern from surface
@@ -366,6 +841,7 @@ class Context(object):
         """
         cairo.cairo_set_source_surface(self._pointer, surface._pointer, x, y)
         self._check_status()
+        self._set_state('source')
 
     def set_source(self, source):
         """Sets the source pattern within this context to ``source``.
@@ -391,6 +867,7 @@ class Context(object):
         """
         cairo.cairo_set_source(self._pointer, source._pointer)
         self._check_status()
+        self._set_state('source')
 
     def get_source(self):
         """Return this context’s source.
@@ -421,12 +898,15 @@ class Context(object):
         :param antialias: An :ref:`ANTIALIAS` string.
 
         """
+        if self._state_unchanged('antialias', antialias):
+            return
         cairo.cairo_set_antialias(self._pointer, antialias)
         self._check_status()
+        self._set_state('antialias', antialias)
 
     def get_antialias(self):
         """Return the :ref:`ANTIALIAS` string."""
-        return cairo.cairo_get_antialias(self._pointer)
+        return self._get_state('antialias', cairo.cairo_get_antialias)
 
     def set_dash(self, dashes, offset=0):
         """Sets the dash pattern to be used by :meth:`stroke`.
@@ -501,12 +981,15 @@ class Context(object):
         :param fill_rule: A :ref:`FILL_RULE` string.
 
         """
+        if self._state_unchanged('fill_rule', fill_rule):
+            return
         cairo.cairo_set_fill_rule(self._pointer, fill_rule)
         self._check_status()
+        self._set_state('fill_rule', fill_rule)
 
     def get_fill_rule(self):
         """Return the current :ref:`FILL_RULE` string."""
-        return cairo.cairo_get_fill_rule(self._pointer)
+        return self._get_state('fill_rule', cairo.cairo_get_fill_rule)
 
     def set_line_cap(self, line_cap):
         """Set the current :ref:`LINE_CAP` within the cairo context.
@@ -520,12 +1003,15 @@ class Context(object):
         :param line_cap: A :ref:`LINE_CAP` string.
 
         """
+        if self._state_unchanged('line_cap', line_cap):
+            return
         cairo.cairo_set_line_cap(self._pointer, line_cap)
         self._check_status()
+        self._set_state('line_cap', line_cap)
 
     def get_line_cap(self):
         """Return the current :ref:`LINE_CAP` string."""
-        return cairo.cairo_get_line_cap(self._pointer)
+        return self._get_state('line_cap', cairo.cairo_get_line_cap)
 
     def set_line_join(self, line_join):
         """Set the current :ref:`LINE_JOIN` within the cairo context.
@@ -539,12 +1025,15 @@ class Context(object):
         :param line_join: A :ref:`LINE_JOIN` string.
 
         """
+        if self._state_unchanged('line_join', line_join):
+            return
         cairo.cairo_set_line_join(self._pointer, line_join)
         self._check_status()
+        self._set_state('line_join', line_join)
 
     def get_line_join(self):
         """Return the current :ref:`LINE_JOIN` string."""
-        return cairo.cairo_get_line_join(self._pointer)
+        return self._get_state('line_join', cairo.cairo_get_line_join)
 
     def set_line_width(self, width):
         """Sets the current line width within the cairo context.
@@ -577,12 +1066,16 @@ class Context(object):
         :param width: The new line width.
 
         """
+        if self._state_unchanged('line_width', width):
+            return
         cairo.cairo_set_line_width(self._pointer, width)
         self._check_status()
+        # cairo clamps negative widths
+        self._set_state('line_width', max(width, 0))
 
     def get_line_width(self):
         """Return the current line width as a float."""
-        return cairo.cairo_get_line_width(self._pointer)
+        return self._get_state('line_width', cairo.cairo_get_line_width)
 
     def set_miter_limit(self, limit):
         """Sets the current miter limit within the cairo context.
@@ -614,12 +1107,15 @@ class Context(object):
         :type limit: float
 
         """
+        if self._state_unchanged('miter_limit', limit):
+            return
         cairo.cairo_set_miter_limit(self._pointer, limit)
         self._check_status()
+        self._set_state('miter_limit', limit)
 
     def get_miter_limit(self):
         """Return the current miter limit as a float."""
-        return cairo.cairo_get_miter_limit(self._pointer)
+        return self._get_state('miter_limit', cairo.cairo_get_miter_limit)
 
     def set_operator(self, operator):
         """Set the current :ref:`OPERATOR`
@@ -630,12 +1126,15 @@ class Context(object):
         :param operator: A :ref:`OPERATOR` string.
 
         """
+        if self._state_unchanged('operator', operator):
+            return
         cairo.cairo_set_operator(self._pointer, operator)
         self._check_status()
+        self._set_state('operator', operator)
 
     def get_operator(self):
         """Return the current :ref:`OPERATOR` string."""
-        return cairo.cairo_get_operator(self._pointer)
+        return self._get_state('operator', cairo.cairo_get_operator)
 
     def set_tolerance(self, tolerance):
         """Sets the tolerance used when converting paths into trapezoids.
@@ -751,10 +1250,10 @@ class Context(object):
 
     def get_matrix(self):
         """Return a copy of the current transformation matrix (CTM)."""
-        matrix = Matrix()
-        cairo.cairo_get_matrix(self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_get_matrix(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
     def identity_matrix(self):
         """Resets the current transformation matrix (CTM)
@@ -836,6 +1335,50 @@ class Context(object):
         self._check_status()
         return tuple(xy)
 
+    def user_to_device_many(self, points, in_place=False):
+        """Transform many coordinates from user space to device space,
+        like :meth:`user_to_device`.
+
+        :param points:
+            The ``(x, y)`` points,
+            see :meth:`Matrix.transform_points` for the data structure.
+        :type in_place: bool
+        :param in_place:
+            See :meth:`Matrix.transform_points`.
+        :returns:
+            See :meth:`Matrix.transform_points`.
+
+        """
+        return self.get_matrix().transform_points(points, in_place)
+
+    def user_to_device_distance_many(self, points, in_place=False):
+        """Transform many distance vectors from user space to device space,
+        like :meth:`user_to_device_distance`.
+
+        See :meth:`user_to_device_many` for parameters and return value.
+
+        """
+        return self.get_matrix().transform_distances(points, in_place)
+
+    def device_to_user_many(self, points, in_place=False):
+        """Transform many coordinates from device space to user space,
+        like :meth:`device_to_user`.
+
+        See :meth:`user_to_device_many` for parameters and return value.
+
+        """
+        return self.get_matrix().inverted().transform_points(points, in_place)
+
+    def device_to_user_distance_many(self, points, in_place=False):
+        """Transform many distance vectors from device space to user space,
+        like :meth:`device_to_user_distance`.
+
+        See :meth:`user_to_device_many` for parameters and return value.
+
+        """
+        return self.get_matrix().inverted().transform_distances(
+            points, in_place)
+
     #
     #  Path
     #
@@ -1021,6 +1564,70 @@ class Context(object):
         cairo.cairo_rectangle(self._pointer, x, y, width, height)
         self._check_status()
 
+    def rectangles(self, rectangles, colors=None):
+        """Adds closed sub-path rectangles to the current path,
+        with one call to cairo.
+
+        This method is equivalent to calling :meth:`rectangle`
+        for each rectangle.
+
+        :param rectangles:
+            The ``(x, y, width, height)`` rectangles,
+            as a C-contiguous buffer of doubles with shape ``(N, 4)``
+            (such as a NumPy array with a ``float64`` dtype
+            or an :class:`array.array` with the ``'d'`` type code),
+            or any other sequence of values
+            or of ``(x, y, width, height)`` sequences.
+        :param colors:
+            If given, the ``(red, green, blue)``
+            or ``(red, green, blue, alpha)`` colors of the rectangles,
+            in the same format as ``rectangles``.
+            Rectangles are then grouped by color
+            and filled with one call to :meth:`fill` per color,
+            in the order of the first rectangle of each color.
+            The current path is cleared before,
+            and the source is restored after.
+
+        """
+        coordinates = _rectangles_coordinates(rectangles)
+        length = len(coordinates) // 8
+        if colors is None:
+            self.append_path(
+                _pack_runs([(RECTANGLE_PATH_TYPES, length)], coordinates))
+            return
+
+        colors = _as_doubles(colors)
+        if length and len(colors) not in (3 * length, 4 * length):
+            raise ValueError('Expected %d or %d color values, got %d.' % (
+                3 * length, 4 * length, len(colors)))
+        channels = len(colors) // length if length else 3
+        keys = list(zip(*(
+            colors[channel::channels].tolist() for channel in range(channels))))
+
+        # Sort rectangles by the index of the first rectangle of their color,
+        # giving one slice of coordinates per color in the expected order
+        firsts = dict(zip(reversed(keys), range(length - 1, -1, -1)))
+        firsts = list(map(firsts.__getitem__, keys))
+        order = sorted(range(length), key=firsts.__getitem__)
+        sorted_coordinates = array('d', bytes(8 * len(coordinates)))
+        view = memoryview(sorted_coordinates)
+        for i in range(8):
+            view[i::8] = array('d', map(coordinates[i::8].__getitem__, order))
+
+        self.new_path()
+        source = self.get_source()
+        try:
+            start = 0
+            for first, count in Counter(firsts).items():
+                self.set_source_rgba(*keys[first])
+                self.append_path(_pack_runs(
+                    [(RECTANGLE_PATH_TYPES, count)],
+                    view[8 * start:8 * (start + count)]))
+                self.fill()
+                start += count
+        finally:
+            self.set_source(source)
+
     def arc(self, xc, yc, radius, angle1, angle2):
         """Adds a circular arc of the given radius to the current path.
         The arc is centered at ``(xc, yc)``,
@@ -1241,7 +1848,7 @@ class Context(object):
         cairo.cairo_close_path(self._pointer)
         self._check_status()
 
-    def copy_path(self):
+    def copy_path(self, as_object=False):
         """Return a copy of the current path.
 
         :returns:
@@ -1256,13 +1863,19 @@ class Context(object):
               ``(x1, y1, x2, y2, x3, y3)``
             * :obj:`CLOSE_PATH <PATH_CLOSE_PATH>` 0 points ``()`` (empty tuple)
 
+            If ``as_object`` is true,
+            a :class:`Path` object keeping the path data
+            without converting it to Python objects.
+
         """
         path = cairo.cairo_copy_path(self._pointer)
+        if as_object:
+            return Path(path)
         result = list(_iter_path(path))
         cairo.cairo_path_destroy(path)
         return result
 
-    def copy_path_flat(self):
+    def copy_path_flat(self, as_object=False):
         """Return a flattened copy of the current path
 
         This method is like :meth:`copy_path`
@@ -1277,11 +1890,14 @@ class Context(object):
         a series of :obj:`LINE_TO <PATH_LINE_TO>` elements.
 
         :returns:
-            A list of ``(path_operation, coordinates)`` tuples.
+            A list of ``(path_operation, coordinates)`` tuples,
+            or a :class:`Path` object if ``as_object`` is true.
             See :meth:`copy_path` for the data structure.
 
         """
         path = cairo.cairo_copy_path_flat(self._pointer)
+        if as_object:
+            return Path(path)
         result = list(_iter_path(path))
         cairo.cairo_path_destroy(path)
         return result
@@ -1292,9 +1908,23 @@ class Context(object):
         or :meth:`copy_path_flat` or it may be constructed manually.
 
         :param path:
-            An iterable of tuples
+            A :class:`Path` object,
+            or an iterable of tuples
             in the same format as returned by :meth:`copy_path`.
 
+            Large paths can also be given as a ``(types, coordinates)``
+            tuple of a buffer of :ref:`PATH_OPERATION` integers
+            (such as a NumPy array or an :class:`array.array`)
+            and of the concatenated coordinates of all the segments,
+            in the format accepted by :meth:`lines_to`.
+
+            Finally, a buffer already laid out
+            as an array of ``cairo_path_data_t``
+            is given to cairo without copy.
+            The types and lengths of its headers are checked,
+            :exc:`ValueError` is raised if they don't match
+            or if the last segment is truncated.
+
         """
         # Both objects need to stay alive
         # until after cairo.cairo_append_path() is finished, but not after.
@@ -1302,6 +1932,56 @@ class Context(object):
         cairo.cairo_append_path(self._pointer, path)
         self._check_status()
 
+    def lines_to(self, points):
+        """Adds lines to the path from the current point
+        to each of the given points, in user-space coordinates.
+        After this call the current point will be the last point.
+
+        This method is equivalent to calling :meth:`line_to`
+        for each point,
+        but the whole path is appended with one call to cairo.
+
+        :param points:
+            The ``(x, y)`` points,
+            as a C-contiguous buffer of doubles with shape ``(N, 2)``
+            (such as a NumPy array with a ``float64`` dtype
+            or an :class:`array.array` with the ``'d'`` type code)
+            that is not copied,
+            or any other sequence of coordinates
+            or of ``(x, y)`` sequences.
+
+        """
+        coordinates = _as_doubles(points)
+        self.append_path(_pack_runs(
+            [((constants.PATH_LINE_TO,), len(coordinates) // 2)],
+            coordinates))
+
+    def polyline(self, points, close=False):
+        """Begin a new sub-path with a :meth:`move_to` to the first point,
+        then add lines to each of the other points.
+
+        This method is equivalent to a call to :meth:`move_to`
+        followed by a call to :meth:`lines_to`,
+        optionally followed by a call to :meth:`close_path`,
+        with one call to cairo.
+
+        :param points:
+            The ``(x, y)`` points.
+            See :meth:`lines_to` for the data structure.
+        :type close: bool
+        :param close: Whether the sub-path is closed.
+
+        """
+        coordinates = _as_doubles(points)
+        length = len(coordinates) // 2
+        runs = []
+        if length:
+            runs.append(((constants.PATH_MOVE_TO,), 1))
+            runs.append(((constants.PATH_LINE_TO,), length - 1))
+            if close:
+                runs.append(((constants.PATH_CLOSE_PATH,), 1))
+        self.append_path(_pack_runs(runs, coordinates))
+
     def path_extents(self):
         """Computes a bounding box in user-space coordinates
         covering the points on the current path.
@@ -1350,7 +2030,7 @@ class Context(object):
 
         """
         cairo.cairo_paint(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def paint_with_alpha(self, alpha):
         """A drawing operator that paints the current source everywhere
@@ -1364,7 +2044,7 @@ class Context(object):
 
         """
         cairo.cairo_paint_with_alpha(self._pointer, alpha)
-        self._check_status()
+        self._check_status_now()
 
     def mask(self, pattern):
         """A drawing operator that paints the current source
@@ -1376,7 +2056,7 @@ class Context(object):
 
         """
         cairo.cairo_mask(self._pointer, pattern._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def mask_surface(self, surface, surface_x=0, surface_y=0):
         """A drawing operator that paints the current source
@@ -1393,7 +2073,113 @@ class Context(object):
         """
         cairo.cairo_mask_surface(
             self._pointer, surface._pointer, surface_x, surface_y)
-        self._check_status()
+        self._check_status_now()
+
+    def _get_stamp(self, path, key, offset):
+        """Return a ``(surface, x, y)`` tuple for a mask of ``path``.
+
+        ``surface`` is an A8 :class:`ImageSurface` with ``path`` filled
+        with the current linear transformation, antialias and fill rule,
+        its origin translated by ``offset`` device units.
+        ``surface`` must be painted at ``(x, y)`` in device space
+        to put the origin of ``path`` at ``offset``.
+        ``surface`` is ``None`` if ``path`` is empty.
+
+        """
+        stamp = self._stamps.get(key + offset)
+        if stamp is not None:
+            return stamp
+        if len(self._stamps) >= 256:
+            # Keep the cache bounded when markers or transformations change
+            self._stamps.clear()
+
+        xx, yx, xy, yy = key[1:5]
+        context = Context(ImageSurface(constants.FORMAT_A8, 0, 0))
+        context.set_matrix(Matrix(xx, yx, xy, yy))
+        cairo.cairo_append_path(context._pointer, path)
+        context.identity_matrix()
+        x1, y1, x2, y2 = context.fill_extents()
+        if x1 == x2 or y1 == y2:
+            stamp = None, 0, 0
+        else:
+            x, y = floor(x1), floor(y1)
+            # One more pixel for the offset
+            surface = ImageSurface(
+                constants.FORMAT_A8, ceil(x2) - x + 1, ceil(y2) - y + 1)
+            context = Context(surface)
+            context.set_antialias(key[5])
+            context.set_fill_rule(key[6])
+            context.translate(offset[0] - x, offset[1] - y)
+            context.transform(Matrix(xx, yx, xy, yy))
+            cairo.cairo_append_path(context._pointer, path)
+            context.fill()
+            stamp = surface, x, y
+        self._stamps[key + offset] = stamp
+        return stamp
+
+    def stamp(self, marker, points, subpixels=1):
+        """Fill ``marker`` at each of the given points,
+        with the current source.
+
+        This method gives the same result as appending ``marker``
+        translated to each point and calling :meth:`fill`,
+        but the marker is only rasterized once into an A8
+        :class:`ImageSurface` mask,
+        that is then painted with :meth:`mask_surface` at each point.
+        Masks are cached for each marker,
+        linear part of the current transformation matrix,
+        antialias, fill rule and subpixel offset,
+        and reused by following calls.
+
+        Positions are snapped to the device pixel grid,
+        or to ``1 / subpixels`` of device pixels.
+
+        :param marker:
+            The marker path, with its origin at the position of points,
+            in any format accepted by :meth:`append_path`.
+        :param points:
+            The ``(x, y)`` points, in user-space coordinates.
+            See :meth:`lines_to` for the data structure.
+        :type subpixels: int
+        :param subpixels:
+            The number of positions rasterized per device pixel,
+            along each axis.
+            More positions give a better precision,
+            and up to ``subpixels ** 2`` masks to rasterize.
+
+        """
+        coordinates = _as_doubles(points)
+        if len(coordinates) % 2:
+            raise ValueError(
+                'Expected an even number of coordinates, got %d.'
+                % len(coordinates))
+        # Both objects need to stay alive until the end of the method.
+        path, _ = _encode_path(marker)
+        xx, yx, xy, yy, x0, y0 = self.get_matrix().as_tuple()
+        key = (
+            bytes(ffi.buffer(path.data, path.num_data * ffi.sizeof(
+                'cairo_path_data_t'))),
+            xx, yx, xy, yy, self.get_antialias(), self.get_fill_rule())
+        stamps = {}
+        pointer = self._pointer
+        mask_surface = cairo.cairo_mask_surface
+        with self:
+            self.identity_matrix()
+            for x, y in zip(coordinates[0::2], coordinates[1::2]):
+                # Device position, rounded to the nearest subpixel
+                device_x = (xx * x + xy * y + x0) * subpixels
+                device_y = (yx * x + yy * y + y0) * subpixels
+                x, offset_x = divmod(floor(device_x + .5), subpixels)
+                y, offset_y = divmod(floor(device_y + .5), subpixels)
+                offset = offset_x, offset_y
+                if offset not in stamps:
+                    stamps[offset] = self._get_stamp(path, key, (
+                        offset_x / subpixels, offset_y / subpixels))
+                surface, stamp_x, stamp_y = stamps[offset]
+                if surface is not None:
+                    mask_surface(
+                        pointer, surface._pointer, x + stamp_x, y + stamp_y)
+        self._check_status_now()
 
     def fill(self):
         """A drawing operator that fills the current path
@@ -1406,7 +2192,7 @@ class Context(object):
 
         """
         cairo.cairo_fill(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def fill_preserve(self):
         """A drawing operator that fills the current path
@@ -1419,7 +2205,7 @@ class Context(object):
 
         """
         cairo.cairo_fill_preserve(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def fill_extents(self):
         """Computes a bounding box in user-space coordinates
@@ -1452,6 +2238,29 @@ class Context(object):
         self._check_status()
         return tuple(extents)
 
+    def _in_many(self, test, points):
+        """Return a bytearray of ``test`` results for each point.
+
+        ``test`` is the name of a ``cairo_in_*`` function without prefix.
+
+        """
+        coordinates = _as_doubles(points)
+        if len(coordinates) % 2:
+            raise ValueError(
+                'Expected an even number of coordinates, got %d.'
+                % len(coordinates))
+        if lib is None:
+            return bytearray(map(
+                getattr(cairo, 'cairo_' + test), repeat(self._pointer),
+                coordinates[0::2], coordinates[1::2]))
+        results = bytearray(len(coordinates) // 2)
+        if results:
+            getattr(lib, 'cairocffi_%s_many' % test)(
+                self._pointer,
+                ffi.cast('double *', ffi.from_buffer(coordinates)),
+                len(results), ffi.from_buffer(results))
+        return results
+
     def in_fill(self, x, y):
         """Tests whether the given point is inside the area
         that would be affected by a :meth:`fill` operation
@@ -1469,6 +2278,25 @@ class Context(object):
         """
         return bool(cairo.cairo_in_fill(self._pointer, x, y))
 
+    def in_fill_many(self, points):
+        """Tests whether each of the given points is inside the area
+        that would be affected by a :meth:`fill` operation,
+        like :meth:`in_fill`.
+
+        With compiled bindings, points are tested in a loop in C.
+
+        :param points:
+            The ``(x, y)`` points to test.
+            See :meth:`lines_to` for the data structure.
+        :returns:
+            A :class:`bytearray` with ``1`` for points inside the area
+            and ``0`` for other points,
+            that can be used as a NumPy array of booleans with
+            ``numpy.frombuffer(result, dtype=bool)``.
+
+        """
+        return self._in_many('in_fill', points)
+
     def stroke(self):
         """A drawing operator that strokes the current path
         according to the current line width, line join, line cap,
@@ -1506,7 +2334,7 @@ class Context(object):
 
         """
         cairo.cairo_stroke(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def stroke_preserve(self):
         """A drawing operator that strokes the current path
@@ -1519,7 +2347,7 @@ class Context(object):
 
         """
         cairo.cairo_stroke_preserve(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def stroke_extents(self):
         """Computes a bounding box in user-space coordinates
@@ -1574,6 +2402,25 @@ class Context(object):
         """
         return bool(cairo.cairo_in_stroke(self._pointer, x, y))
 
+    def in_stroke_many(self, points):
+        """Tests whether each of the given points is inside the area
+        that would be affected by a :meth:`stroke` operation,
+        like :meth:`in_stroke`.
+
+        With compiled bindings, points are tested in a loop in C.
+
+        :param points:
+            The ``(x, y)`` points to test.
+            See :meth:`lines_to` for the data structure.
+        :returns:
+            A :class:`bytearray` with ``1`` for points inside the area
+            and ``0`` for other points,
+            that can be used as a NumPy array of booleans with
+            ``numpy.frombuffer(result, dtype=bool)``.
+
+        """
+        return self._in_many('in_stroke', points)
+
     def clip(self):
         """Establishes a new clip region
         by intersecting the current clip region
@@ -1682,6 +2529,25 @@ class Context(object):
         """
         return bool(cairo.cairo_in_clip(self._pointer, x, y))
 
+    def in_clip_many(self, points):
+        """Tests whether each of the given points is inside the area
+        that would be visible through the current clip,
+        like :meth:`in_clip`.
+
+        With compiled bindings, points are tested in a loop in C.
+
+        :param points:
+            The ``(x, y)`` points to test.
+            See :meth:`lines_to` for the data structure.
+        :returns:
+            A :class:`bytearray` with ``1`` for points inside the area
+            and ``0`` for other points,
+            that can be used as a NumPy array of booleans with
+            ``numpy.frombuffer(result, dtype=bool)``.
+
+        """
+        return self._in_many('in_clip', points)
+
     def reset_clip(self):
         """Reset the current clip region to its original, unrestricted state.
         That is, set the clip region to an infinitely large shape
@@ -1789,8 +2655,11 @@ class Context(object):
         :type size: float
 
         """
+        if self._state_unchanged('font_size', size):
+            return
         cairo.cairo_set_font_size(self._pointer, size)
         self._check_status()
+        self._set_state('font_size', size)
 
     def set_font_matrix(self, matrix):
         """Sets the current font matrix to ``matrix``.
@@ -1809,6 +2678,7 @@ class Context(object):
         """
         cairo.cairo_set_font_matrix(self._pointer, matrix._pointer)
         self._check_status()
+        self._set_state('font_size')
 
     def get_font_matrix(self):
         """Copies the current font matrix. See :meth:`set_font_matrix`.
@@ -1816,10 +2686,10 @@ class Context(object):
         :returns: A new :class:`Matrix`.
 
         """
-        matrix = Matrix()
-        cairo.cairo_get_font_matrix(self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_get_font_matrix(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
     def set_font_options(self, font_options):
         """Sets a set of custom font rendering options.
@@ -1860,6 +2730,7 @@ class Context(object):
         """
         cairo.cairo_set_scaled_font(self._pointer, scaled_font._pointer)
         self._check_status()
+        self._set_state('font_size')
 
     def get_scaled_font(self):
         """Return the current scaled font.
@@ -1935,6 +2806,50 @@ class Context(object):
     #  Text
     #
 
+    def set_text_extents_cache_size(self, size):
+        """Enable, resize or disable the cache of :meth:`text_extents`.
+
+        When enabled, extents are kept
+        for the last ``size`` different texts and scaled fonts.
+        The scaled font of the context
+        depends on the font face, the font matrix, the font options
+        and the current transformation matrix (except for translations):
+        changing any of them uses different cache entries,
+        and setting them back uses the same entries again.
+        The least recently used extents are dropped when the cache is full.
+
+        The number of calls using the cache
+        and the number of calls that had to ask cairo
+        are given by the ``text_extents_cache_hits``
+        and ``text_extents_cache_misses`` attributes.
+
+        :type size: int
+        :param size:
+            The maximum number of extents in the cache,
+            or 0 to disable and clear the cache.
+
+        """
+        self._text_extents_cache_size = size
+        if size <= 0:
+            self._text_extents_cache = None
+            self._text_extents_fonts = {}
+            return
+        if self._text_extents_cache is None:
+            self._text_extents_cache = OrderedDict()
+        while len(self._text_extents_cache) > size:
+            self._drop_text_extents()
+
+    def _drop_text_extents(self):
+        """Drop the least recently used cached extents,
+        and the scaled font of their key if it is not used anymore.
+
+        """
+        (pointer, _), _ = self._text_extents_cache.popitem(last=False)
+        font = self._text_extents_fonts[pointer]
+        font[1] -= 1
+        if not font[1]:
+            del self._text_extents_fonts[pointer]
+
     def text_extents(self, text):
         """Returns the extents for a string of text.
 
@@ -1997,6 +2912,30 @@ class Context(object):
             as found in East-Asian languages.
 
         """
+        cache = self._text_extents_cache
+        if cache is None:
+            return self._text_extents(text)
+        pointer = cairo.cairo_get_scaled_font(self._pointer)
+        key = (pointer, text)
+        extents = cache.get(key)
+        if extents is None:
+            self.text_extents_cache_misses += 1
+            extents = self._text_extents(text)
+            font = self._text_extents_fonts.get(pointer)
+            if font is None:
+                font = self._text_extents_fonts[pointer] = [
+                    ScaledFont._from_pointer(pointer, incref=True), 0]
+            font[1] += 1
+            cache[key] = extents
+            if len(cache) > self._text_extents_cache_size:
+                self._drop_text_extents()
+        else:
+            self.text_extents_cache_hits += 1
+            cache.move_to_end(key)
+        return extents
+
+    def _text_extents(self, text):
+        """Call cairo for :meth:`text_extents`."""
         extents = ffi.new('cairo_text_extents_t *')
         cairo.cairo_text_extents(self._pointer, _encode_string(text), extents)
         self._check_status()
@@ -2072,7 +3011,7 @@ class Context(object):
 
         """
         cairo.cairo_show_text(self._pointer, _encode_string(text))
-        self._check_status()
+        self._check_status_now()
 
     def show_glyphs(self, glyphs):
         """A drawing operator that generates the shape from a list of glyphs,
@@ -2089,7 +3028,7 @@ class Context(object):
         """
         glyphs = ffi.new('cairo_glyph_t[]', glyphs)
         cairo.cairo_show_glyphs(self._pointer, glyphs, len(glyphs))
-        self._check_status()
+        self._check_status_now()
 
     def show_text_glyphs(self, text, glyphs, clusters, cluster_flags=0):
         """This operation has rendering effects similar to :meth:`show_glyphs`
@@ -2156,7 +3095,7 @@ class Context(object):
         cairo.cairo_show_text_glyphs(
             self._pointer, _encode_string(text), -1,
             glyphs, len(glyphs), clusters, len(clusters), cluster_flags)
-        self._check_status()
+        self._check_status_now()
 
     #
     #  Pages
@@ -2173,7 +3112,7 @@ class Context(object):
 
         """
         cairo.cairo_show_page(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     def copy_page(self):
         """Emits the current page  for backends that support multiple pages,
@@ -2188,7 +3127,7 @@ class Context(object):
 
         """
         cairo.cairo_copy_page(self._pointer)
-        self._check_status()
+        self._check_status_now()
 
     #
     #  Tags
@@ -0,0 +1,512 @@
+"""
+    cairocffi.displaylist
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Display lists, recording drawing operations to replay them,
+    possibly in other processes.
+
+    :copyright: Copyright 2013-2019 by Simon Sapin
+    :license: BSD, see LICENSE for details.
+
+"""
+
+import inspect
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+
+from . import cairo, ffi
+from . import context as context_module
+from .ffi import lib
+from .fonts import _encode_string
+from .matrix import Matrix
+from .opcodes import OPCODES, OPERATIONS
+from .patterns import LinearGradient, RadialGradient, SolidPattern, SurfacePattern
+from .surfaces import ImageSurface
+
+# Context methods that don't change the drawing, allowed while recording
+QUERY_PREFIXES = (
+    'get_', 'has_', 'in_', 'copy_path', 'copy_clip', 'user_to_', 'device_to_')
+QUERY_SUFFIXES = ('_extents',)
+# Context methods only calling other methods, that are recorded instead
+COMPOSITE_METHODS = (
+    'record', 'deferred_errors', 'lines_to', 'polyline', 'rectangles')
+
+# Number of floats and of objects stored for each opcode
+FLOATS_COUNTS = [
+    sum({'d': 1, 'i': 1, 'm': 6}.get(type_, 0) for type_ in types)
+    for _, types in OPERATIONS]
+OBJECTS_COUNTS = [types.count('o') for _, types in OPERATIONS]
+
+# Serialization: magic, byte order, numbers of opcodes, floats and objects
+HEADER = struct.Struct('<4scQQQ')
+MAGIC = b'CDL1'
+BYTE_ORDER = sys.byteorder[0].encode('ascii')
+SIZE = struct.Struct('<Q')
+INTEGER = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+GLYPH = struct.Struct('=Qdd')
+
+
+def _encode_image(surface):
+    """Return a tuple with the pixels of an image surface."""
+    if not isinstance(surface, ImageSurface):
+        raise ValueError('Only image surfaces can be recorded')
+    surface.flush()
+    return (
+        surface.get_format(), surface.get_width(), surface.get_height(),
+        surface.get_stride(), bytes(surface.get_data()))
+
+
+def _decode_image(image):
+    """Return an image surface from a tuple given by :func:`_encode_image`."""
+    format, width, height, stride, data = image
+    return ImageSurface(format, width, height, bytearray(data), stride)
+
+
+def _encode_pattern(pattern):
+    """Return a tuple describing a pattern."""
+    if isinstance(pattern, SolidPattern):
+        return ('solid', *pattern.get_rgba())
+    elif isinstance(pattern, SurfacePattern):
+        description = ('surface', _encode_image(pattern.get_surface()))
+    elif isinstance(pattern, LinearGradient):
+        description = (
+            'linear', pattern.get_linear_points(),
+            tuple(pattern.get_color_stops()))
+    elif isinstance(pattern, RadialGradient):
+        description = (
+            'radial', pattern.get_radial_circles(),
+            tuple(pattern.get_color_stops()))
+    else:
+        raise ValueError(
+            'Only solid, surface and gradient patterns can be recorded')
+    return (
+        *description, pattern.get_extend(), pattern.get_filter(),
+        pattern.get_matrix().as_tuple())
+
+
+def _decode_pattern(description):
+    """Return a pattern from a tuple given by :func:`_encode_pattern`."""
+    kind = description[0]
+    if kind == 'solid':
+        return SolidPattern(*description[1:])
+    elif kind == 'surface':
+        pattern = SurfacePattern(_decode_image(description[1]))
+        extend, filter, matrix = description[2:]
+    elif kind in ('linear', 'radial'):
+        gradient_class = LinearGradient if kind == 'linear' else RadialGradient
+        pattern = gradient_class(*description[1])
+        for stop in description[2]:
+            pattern.add_color_stop_rgba(*stop)
+        extend, filter, matrix = description[3:]
+    else:
+        raise ValueError('Unknown pattern type: %r' % kind)
+    pattern.set_extend(extend)
+    pattern.set_filter(filter)
+    pattern.set_matrix(Matrix(*matrix))
+    return pattern
+
+
+def _encode_path(path):
+    """Return the ``cairo_path_data_t`` bytes of a path."""
+    pointer, _ = context_module._encode_path(path)
+    return bytes(ffi.buffer(
+        pointer.data, pointer.num_data * ffi.sizeof('cairo_path_data_t')))
+
+
+def _encode_text(text):
+    """Return ``text`` if it is a Unicode or byte string."""
+    if not isinstance(text, (str, bytes)):
+        raise TypeError('Expected a string, got %r' % type(text))
+    return text
+
+
+def _encode_glyphs(glyphs):
+    """Return the packed ``(index, x, y)`` values of glyphs."""
+    return b''.join(GLYPH.pack(index, x, y) for index, x, y in glyphs)
+
+
+def _decode_glyphs(glyphs):
+    """Return a ``cairo_glyph_t`` array from :func:`_encode_glyphs` bytes."""
+    return ffi.new('cairo_glyph_t[]', list(GLYPH.iter_unpack(glyphs)))
+
+
+# Functions encoding the arguments of operations storing objects
+ENCODERS = {
+    'set_dash': lambda dashes, offset: (tuple(map(float, dashes)), offset),
+    'append_path': lambda path: (_encode_path(path),),
+    'set_source': lambda pattern: (_encode_pattern(pattern),),
+    'set_source_surface': lambda surface, x, y: (
+        _encode_image(surface), x, y),
+    'mask': lambda pattern: (_encode_pattern(pattern),),
+    'mask_surface': lambda surface, x, y: (_encode_image(surface), x, y),
+    'select_font_face': lambda family, slant, weight: (
+        _encode_text(family), slant, weight),
+    'show_text': lambda text: (_encode_text(text),),
+    'text_path': lambda text: (_encode_text(text),),
+    'show_glyphs': lambda glyphs: (_encode_glyphs(glyphs),),
+    'glyph_path': lambda glyphs: (_encode_glyphs(glyphs),),
+}
+
+
+def _replay_set_dash(pointer, dashes, offset):
+    dashes = ffi.new('double[]', dashes)
+    cairo.cairo_set_dash(pointer, dashes, len(dashes), offset)
+
+
+def _replay_append_path(pointer, data):
+    path, _ = context_module._encode_path(data)
+    cairo.cairo_append_path(pointer, path)
+
+
+def _replay_glyphs(function_name):
+    def replay(pointer, glyphs):
+        glyphs = _decode_glyphs(glyphs)
+        getattr(cairo, function_name)(pointer, glyphs, len(glyphs))
+    return replay
+
+
+# Functions replaying operations that can't call cairo with their arguments
+REPLAYERS = {
+    'set_dash': _replay_set_dash,
+    'set_matrix': lambda pointer, matrix: cairo.cairo_set_matrix(
+        pointer, matrix._pointer),
+    'transform': lambda pointer, matrix: cairo.cairo_transform(
+        pointer, matrix._pointer),
+    'append_path': _replay_append_path,
+    'set_source': lambda pointer, pattern: cairo.cairo_set_source(
+        pointer, _decode_pattern(pattern)._pointer),
+    'set_source_surface': lambda pointer, image, x, y: (
+        cairo.cairo_set_source_surface(
+            pointer, _decode_image(image)._pointer, x, y)),
+    'mask': lambda pointer, pattern: cairo.cairo_mask(
+        pointer, _decode_pattern(pattern)._pointer),
+    'mask_surface': lambda pointer, image, x, y: cairo.cairo_mask_surface(
+        pointer, _decode_image(image)._pointer, x, y),
+    'select_font_face': lambda pointer, family, slant, weight: (
+        cairo.cairo_select_font_face(
+            pointer, _encode_string(family), slant, weight)),
+    'set_font_matrix': lambda pointer, matrix: cairo.cairo_set_font_matrix(
+        pointer, matrix._pointer),
+    'show_text': lambda pointer, text: cairo.cairo_show_text(
+        pointer, _encode_string(text)),
+    'text_path': lambda pointer, text: cairo.cairo_text_path(
+        pointer, _encode_string(text)),
+    'show_glyphs': _replay_glyphs('cairo_show_glyphs'),
+    'glyph_path': _replay_glyphs('cairo_glyph_path'),
+}
+
+
+def _dump_object(output, value):
+    """Append the serialization of ``value`` to the ``output`` bytearray."""
+    if isinstance(value, tuple):
+        output += b't' + SIZE.pack(len(value))
+        for item in value:
+            _dump_object(output, item)
+    elif isinstance(value, str):
+        value = value.encode('utf-8')
+        output += b's' + SIZE.pack(len(value)) + value
+    elif isinstance(value, bytes):
+        output += b'b' + SIZE.pack(len(value)) + value
+    elif isinstance(value, int):
+        output += b'i' + INTEGER.pack(value)
+    else:
+        output += b'd' + FLOAT.pack(value)
+
+
+def _load_object(data, position):
+    """Return the object serialized at ``position`` in ``data``
+    and the position following it.
+
+    """
+    tag = bytes(data[position:position + 1])
+    position += 1
+    if tag == b't':
+        length, = SIZE.unpack_from(data, position)
+        position += SIZE.size
+        items = []
+        for _ in range(length):
+            item, position = _load_object(data, position)
+            items.append(item)
+        return tuple(items), position
+    elif tag in (b's', b'b'):
+        length, = SIZE.unpack_from(data, position)
+        position += SIZE.size
+        value = bytes(data[position:position + length])
+        if len(value) != length:
+            raise ValueError('Truncated display list')
+        return (
+            value.decode('utf-8') if tag == b's' else value,
+            position + length)
+    elif tag == b'i':
+        return INTEGER.unpack_from(data, position)[0], position + INTEGER.size
+    elif tag == b'd':
+        return FLOAT.unpack_from(data, position)[0], position + FLOAT.size
+    raise ValueError('Invalid object in display list: %r' % tag)
+
+
+class DisplayList(object):
+    """A list of drawing operations,
+    recorded from a :class:`Context` with :meth:`Context.record`.
+
+    Operations are stored in compact arrays of opcodes and arguments,
+    and can be replayed on any context with :meth:`replay`.
+
+    The operations that can be recorded are the :class:`Context` methods
+    setting the source color, pattern or image surface,
+    the operator, the antialias, the fill rule,
+    the line cap, join, width, miter limit and dash pattern, the tolerance,
+    the font face, size and matrix,
+    transforming the matrix,
+    building paths with lines, curves, arcs, rectangles, text, glyphs
+    and appended paths,
+    saving and restoring the state, pushing and popping groups to the source,
+    painting, masking, filling, stroking, clipping,
+    showing text and glyphs, and showing and copying pages.
+    Patterns can be solid colors, gradients or image surfaces,
+    fonts are selected with :meth:`Context.select_font_face`.
+
+    Display lists keep no reference to cairo objects.
+    They can be pickled or serialized with :meth:`to_bytes`,
+    for example to render pages in other processes::
+
+        def render(data):
+            surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, 100, 100)
+            cairocffi.DisplayList.from_bytes(data).replay(
+                cairocffi.Context(surface))
+            return bytes(surface.get_data())
+
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            images = list(executor.map(render, (
+                display_list.to_bytes() for display_list in pages)))
+
+    """
+    def __init__(self):
+        self._opcodes = array('B')
+        self._arguments = array('d')
+        self._objects = []
+
+    def __len__(self):
+        return len(self._opcodes)
+
+    def __reduce__(self):
+        return type(self).from_bytes, (self.to_bytes(),)
+
+    def append(self, name, *arguments):
+        """Append an operation to the list.
+
+        :param name:
+            The name of the :class:`Context` method for this operation,
+            such as ``'move_to'``.
+        :param arguments:
+            The arguments of the method, without default values.
+        :raises:
+            :exc:`ValueError` if the operation can't be recorded,
+            :exc:`TypeError` if the number of arguments is incorrect.
+
+        """
+        self._append(*self._encode(name, arguments))
+
+    def _encode(self, name, arguments):
+        """Return the opcode, floats and objects storing an operation."""
+        opcode = OPCODES.get(name)
+        if opcode is None:
+            raise ValueError('Context.%s() cannot be recorded' % name)
+        types = OPERATIONS[opcode][1]
+        if len(arguments) != len(types):
+            raise TypeError('Context.%s() takes %d arguments, got %d' % (
+                name, len(types), len(arguments)))
+        if name in ENCODERS:
+            arguments = ENCODERS[name](*arguments)
+        floats = array('d')
+        objects = []
+        for value, type_ in zip(arguments, types):
+            if type_ == 'o':
+                objects.append(value)
+            elif type_ == 'm':
+                floats.extend(value.as_tuple())
+            else:
+                floats.append(value)
+        return opcode, floats, objects
+
+    def _append(self, opcode, floats, objects):
+        """Append an operation returned by :meth:`_encode`."""
+        self._arguments.extend(floats)
+        self._objects.extend(objects)
+        self._opcodes.append(opcode)
+
+    def clear(self):
+        """Remove all the operations from the list."""
+        del self._opcodes[:]
+        del self._arguments[:]
+        del self._objects[:]
+
+    def to_bytes(self):
+        """Serialize the list.
+
+        Floats are stored with the native byte order,
+        the serialized list can only be loaded on machines
+        with the same byte order.
+
+        :returns: A byte string that can be given to :meth:`from_bytes`.
+
+        """
+        output = bytearray(HEADER.pack(
+            MAGIC, BYTE_ORDER, len(self._opcodes), len(self._arguments),
+            len(self._objects)))
+        output += self._opcodes.tobytes()
+        output += self._arguments.tobytes()
+        for value in self._objects:
+            _dump_object(output, value)
+        return bytes(output)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a list serialized by :meth:`to_bytes`.
+
+        As with :mod:`pickle`,
+        only load data from trusted sources:
+        paths are given to cairo without being checked.
+
+        :param data: A byte string or any other buffer.
+        :returns: A new :class:`DisplayList`.
+        :raises: :exc:`ValueError` if ``data`` is invalid.
+
+        """
+        data = memoryview(data).cast('B')
+        try:
+            magic, byte_order, *lengths = HEADER.unpack_from(data)
+        except struct.error as exception:
+            raise ValueError('Invalid display list') from exception
+        if magic != MAGIC:
+            raise ValueError('Invalid display list')
+        if byte_order != BYTE_ORDER:
+            raise ValueError(
+                'Display list serialized with another byte order')
+        opcodes_length, arguments_length, objects_length = lengths
+
+        self = cls()
+        position = HEADER.size
+        end = position + opcodes_length
+        self._opcodes.frombytes(data[position:end])
+        position, end = end, end + arguments_length * self._arguments.itemsize
+        self._arguments.frombytes(data[position:end])
+        position = end
+        try:
+            for _ in range(objects_length):
+                value, position = _load_object(data, position)
+                self._objects.append(value)
+        except struct.error as exception:
+            raise ValueError('Truncated display list') from exception
+
+        if (len(self._opcodes) != opcodes_length or
+                len(self._arguments) != arguments_length or
+                position != len(data)):
+            raise ValueError('Invalid display list length')
+        if self._opcodes and max(self._opcodes) >= len(OPERATIONS):
+            raise ValueError('Invalid opcode in display list')
+        if (sum(map(FLOATS_COUNTS.__getitem__, self._opcodes)) !=
+                arguments_length or
+                sum(map(OBJECTS_COUNTS.__getitem__, self._opcodes)) !=
+                objects_length):
+            raise ValueError('Invalid number of arguments in display list')
+        return self
+
+    def replay(self, context):
+        """Replay the operations of the list on ``context``.
+
+        With compiled bindings, operations only taking numbers
+        are replayed in a loop in C.
+        Other operations are replayed without calling :class:`Context`
+        methods.
+        In both cases, the status of ``context`` is checked at the end,
+        and its state cache is cleared.
+
+        :param context: A :class:`Context` object.
+
+        """
+        pointer = context._pointer
+        opcodes = self._opcodes
+        arguments = self._arguments
+        objects = iter(self._objects)
+        length = len(opcodes)
+        position = argument_position = 0
+        functions = [
+            REPLAYERS.get(name) or getattr(cairo, 'cairo_' + name)
+            for name, _ in OPERATIONS]
+        if lib is not None and length:
+            opcodes_pointer = ffi.cast(
+                'unsigned char *', ffi.from_buffer(opcodes))
+            arguments_start = ffi.cast('double *', ffi.from_buffer(arguments))
+            arguments_pointer = ffi.new('double **', arguments_start)
+
+        while position < length:
+            if lib is not None:
+                arguments_pointer[0] = arguments_start + argument_position
+                position += lib.cairocffi_replay(
+                    pointer, opcodes_pointer + position, length - position,
+                    arguments_pointer)
+                argument_position = arguments_pointer[0] - arguments_start
+                if position == length:
+                    break
+            opcode = opcodes[position]
+            values = []
+            for type_ in OPERATIONS[opcode][1]:
+                if type_ == 'o':
+                    values.append(next(objects))
+                elif type_ == 'm':
+                    values.append(Matrix(*arguments[
+                        argument_position:argument_position + 6]))
+                    argument_position += 6
+                else:
+                    value = arguments[argument_position]
+                    values.append(int(value) if type_ == 'i' else value)
+                    argument_position += 1
+            functions[opcode](pointer, *values)
+            position += 1
+
+        context._forget_state()
+        context._check_status_now()
+
+    def _recorders(self, context):
+        """Return a dict of functions replacing the methods of ``context``
+        while recording.
+
+        """
+        recorders = {}
+        for name, method in inspect.getmembers(context, inspect.ismethod):
+            if name.startswith(('_', *QUERY_PREFIXES)) or (
+                    name.endswith(QUERY_SUFFIXES)) or (
+                    name in COMPOSITE_METHODS):
+                continue
+            recorders[name] = self._recorder(name, method)
+        return recorders
+
+    def _recorder(self, name, method):
+        """Return a function calling ``method`` and recording the call."""
+        if name not in OPCODES:
+            def record(*args, **kwargs):
+                raise ValueError('Context.%s() cannot be recorded' % name)
+            return record
+
+        signature = inspect.signature(method)
+
+        def record(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Iterators can only be used once, give the same list
+            # to the encoder and to the method
+            for key, value in bound.arguments.items():
+                if isinstance(value, Iterator):
+                    bound.arguments[key] = list(value)
+            arguments = bound.args
+            if name == 'scale' and arguments[1] is None:
+                arguments = (arguments[0], arguments[0])
+            # Encode before calling, to raise before drawing if needed
+            operation = self._encode(name, arguments)
+            result = method(*bound.args, **bound.kwargs)
+            self._append(*operation)
+            return result
+        return record
@@ -9,27 +9,104 @@
 
 """
 
+from threading import Lock
+
 from cffi import FFI
 
 from . import constants
 
-# Primary cffi definitions
-ffi = FFI()
-ffi.cdef(constants._CAIRO_HEADERS)
+# Declarations of optional parts of cairo, only parsed on first use.
+# Keys are the second word of the names declared by each header.
+BACKEND_HEADERS = {
+    'mesh': constants._CAIRO_MESH_HEADERS,
+    'region': constants._CAIRO_REGION_HEADERS,
+    'pdf': constants._CAIRO_PDF_HEADERS,
+    'ps': constants._CAIRO_PS_HEADERS,
+    'svg': constants._CAIRO_SVG_HEADERS,
+    'win32': constants._CAIRO_WIN32_HEADERS,
+    'quartz': constants._CAIRO_QUARTZ_HEADERS,
+    'xcb': constants._CAIRO_XCB_HEADERS,
+}
+
+# A function declared by each header, telling whether it has been compiled
+BACKEND_FUNCTIONS = {
+    'mesh': 'cairo_mesh_pattern_begin_patch',
+    'region': 'cairo_region_create',
+    'pdf': 'cairo_pdf_surface_create',
+    'ps': 'cairo_ps_surface_create',
+    'svg': 'cairo_svg_surface_create',
+    'win32': 'cairo_win32_surface_create',
+    'quartz': 'cairo_quartz_surface_create',
+    'xcb': 'cairo_xcb_surface_create',
+}
 
-# include xcffib cffi definitions for cairo xcb support
 try:
-    from xcffib.ffi import ffi as xcb_ffi
-except (ImportError, OSError):
-    pass
-else:
-    ffi.include(xcb_ffi)
-    ffi.cdef(constants._CAIRO_XCB_HEADERS)
+    # Compiled API-mode bindings, see ffi_build.py
+    from ._cairocffi import ffi, lib
+except ImportError:
+    # Primary cffi definitions
+    ffi = FFI()
+    ffi.cdef(constants._CAIRO_HEADERS)
+    lib = None
+    loaded_backends = set()
+else:  # pragma: no cover
+    # Backends included by ffi_build.py are already declared
+    loaded_backends = {
+        backend for backend, function in BACKEND_FUNCTIONS.items()
+        if hasattr(lib, function)}
+backends_lock = Lock()
+
+
+def cdef_backend(backend):
+    """Parse the declarations of ``backend`` if they are not parsed yet.
+
+    :returns: Whether the declarations are available.
+
+    """
+    if backend in loaded_backends:
+        return True
+    if lib is not None or backend not in BACKEND_HEADERS:
+        return False
+    with backends_lock:
+        if backend not in loaded_backends:
+            if backend == 'xcb':
+                # include xcffib cffi definitions for cairo xcb support
+                try:
+                    from xcffib.ffi import ffi as xcb_ffi
+                except (ImportError, OSError):
+                    return False
+                ffi.include(xcb_ffi)
+            ffi.cdef(BACKEND_HEADERS[backend])
+            loaded_backends.add(backend)
+    return True
+
+
+class LazyLibrary(object):
+    """Wrap a library loaded by :func:`FFI.dlopen`,
+    parsing the declarations of cairo backends when they are first needed.
+
+    """
+    def __init__(self, library):
+        self._library = library
+
+    def __getattr__(self, name):
+        words = name.lower().split('_', 2)
+        if len(words) == 3 and words[0] == 'cairo':
+            cdef_backend(words[1])
+        value = getattr(self._library, name)
+        # Next lookups don't call __getattr__
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return dir(self._library)
+
 
 # gdk pixbuf cffi definitions
+# Compiled FFI objects can't be included, cairo_t is thus declared again
 ffi_pixbuf = FFI()
-ffi_pixbuf.include(ffi)
 ffi_pixbuf.cdef('''
+    typedef struct _cairo cairo_t;
     typedef unsigned long   gsize;
     typedef unsigned int    guint32;
     typedef unsigned int    guint;
@@ -0,0 +1,240 @@
+"""
+    cairocffi.ffi_build
+    ~~~~~~~~~~~~~~~~~~~
+
+    Build the optional API-mode cffi extension.
+
+    cairocffi works without it, parsing C declarations at import time and
+    loading cairo with ``ffi.dlopen()``. Running this file once after
+    installation compiles these declarations into ``cairocffi._cairocffi``,
+    that is then imported instead. A C compiler and cairo’s development
+    headers are required::
+
+        python -m cairocffi.ffi_build
+
+    XCB declarations are not included in the extension, they are parsed
+    when XCB surfaces are first created. When the extension can't be built,
+    for example with a version of cairo older than the declarations,
+    cairocffi keeps working without it.
+
+    :copyright: Copyright 2013-2019 by Simon Sapin
+    :license: BSD, see LICENSE for details.
+
+"""
+
+import sys
+from pathlib import Path
+
+from cffi import FFI, VerificationError
+
+# Import constants and opcodes without importing the cairocffi package, as
+# the package itself is not importable without a cairo library.
+sys.path.insert(0, str(Path(__file__).parent))
+import constants
+import opcodes
+
+del sys.path[0]
+
+C_SOURCE = '''
+    #include <stdlib.h>
+    #include <string.h>
+    #include <cairo.h>
+    #include <cairo-pdf.h>
+    #include <cairo-ps.h>
+    #include <cairo-svg.h>
+'''
+
+# Helpers looping in C over arrays, used when available by cairocffi
+HELPERS_HEADERS = '''
+    void cairocffi_in_fill_many (
+        cairo_t *cr, const double *points, size_t length, char *results);
+    void cairocffi_in_stroke_many (
+        cairo_t *cr, const double *points, size_t length, char *results);
+    void cairocffi_in_clip_many (
+        cairo_t *cr, const double *points, size_t length, char *results);
+    void cairocffi_matrix_transform_points (
+        const cairo_matrix_t *matrix, double *points, size_t length);
+    void cairocffi_matrix_transform_distances (
+        const cairo_matrix_t *matrix, double *points, size_t length);
+    size_t cairocffi_replay (
+        cairo_t *cr, const unsigned char *opcodes, size_t length,
+        const double **arguments);
+    typedef struct {
+        unsigned char *data;
+        size_t length;
+        size_t capacity;
+    } cairocffi_buffer_t;
+    cairo_status_t cairocffi_surface_write_to_png_buffer (
+        cairo_surface_t *surface, cairocffi_buffer_t *buffer);
+    void cairocffi_buffer_free (cairocffi_buffer_t *buffer);
+    cairo_surface_t * cairocffi_image_surface_create_from_png_buffer (
+        const unsigned char *data, size_t length);
+    void cairocffi_scaled_font_text_extents_many (
+        cairo_scaled_font_t *scaled_font, const char *utf8, size_t length,
+        cairo_text_extents_t *extents);
+    extern "Python" void cairocffi_destroy (void *data);
+'''
+HELPERS_SOURCE = '''
+    #define CAIROCFFI_IN_MANY(test) \\
+        static void cairocffi_##test##_many ( \\
+            cairo_t *cr, const double *points, size_t length, \\
+            char *results) { \\
+          size_t i; \\
+          for (i = 0; i < length; i++) \\
+            results[i] = cairo_##test(cr, points[2 * i], points[2 * i + 1]); \\
+        }
+    CAIROCFFI_IN_MANY(in_fill)
+    CAIROCFFI_IN_MANY(in_stroke)
+    CAIROCFFI_IN_MANY(in_clip)
+
+    #define CAIROCFFI_TRANSFORM_MANY(name, transform) \\
+        static void cairocffi_matrix_transform_##name ( \\
+            const cairo_matrix_t *matrix, double *points, size_t length) { \\
+          size_t i; \\
+          for (i = 0; i < length; i++) \\
+            cairo_matrix_transform_##transform( \\
+              matrix, &points[2 * i], &points[2 * i + 1]); \\
+        }
+    CAIROCFFI_TRANSFORM_MANY(points, point)
+    CAIROCFFI_TRANSFORM_MANY(distances, distance)
+
+    /* Replay operations until one that must be replayed in Python,
+       return the number of operations replayed and advance arguments. */
+    static size_t cairocffi_replay (
+        cairo_t *cr, const unsigned char *opcodes, size_t length,
+        const double **arguments) {
+      const double *a = *arguments;
+      size_t i;
+      for (i = 0; i < length; i++) {
+        switch (opcodes[i]) {
+%s
+          default: *arguments = a; return i;
+        }
+      }
+      *arguments = a;
+      return i;
+    }
+
+    typedef struct {
+        unsigned char *data;
+        size_t length;
+        size_t capacity;
+    } cairocffi_buffer_t;
+
+    /* cairo_write_func_t appending data to a growing cairocffi_buffer_t */
+    static cairo_status_t cairocffi_buffer_write (
+        void *closure, const unsigned char *data, unsigned int length) {
+      cairocffi_buffer_t *buffer = closure;
+      if (length > buffer->capacity - buffer->length) {
+        size_t capacity = buffer->capacity ? buffer->capacity : 4096;
+        unsigned char *new_data;
+        while (length > capacity - buffer->length)
+          capacity *= 2;
+        new_data = realloc (buffer->data, capacity);
+        if (new_data == NULL)
+          return CAIRO_STATUS_NO_MEMORY;
+        buffer->data = new_data;
+        buffer->capacity = capacity;
+      }
+      memcpy (buffer->data + buffer->length, data, length);
+      buffer->length += length;
+      return CAIRO_STATUS_SUCCESS;
+    }
+
+    static cairo_status_t cairocffi_surface_write_to_png_buffer (
+        cairo_surface_t *surface, cairocffi_buffer_t *buffer) {
+      return cairo_surface_write_to_png_stream (
+        surface, cairocffi_buffer_write, buffer);
+    }
+
+    static void cairocffi_buffer_free (cairocffi_buffer_t *buffer) {
+      free (buffer->data);
+      buffer->data = NULL;
+      buffer->length = buffer->capacity = 0;
+    }
+
+    typedef struct {
+        const unsigned char *data;
+        size_t length;
+    } cairocffi_cursor_t;
+
+    /* cairo_read_func_t reading data from a cairocffi_cursor_t */
+    static cairo_status_t cairocffi_cursor_read (
+        void *closure, unsigned char *data, unsigned int length) {
+      cairocffi_cursor_t *cursor = closure;
+      if (length > cursor->length)
+        return CAIRO_STATUS_READ_ERROR;
+      memcpy (data, cursor->data, length);
+      cursor->data += length;
+      cursor->length -= length;
+      return CAIRO_STATUS_SUCCESS;
+    }
+
+    static cairo_surface_t *cairocffi_image_surface_create_from_png_buffer (
+        const unsigned char *data, size_t length) {
+      cairocffi_cursor_t cursor;
+      cursor.data = data;
+      cursor.length = length;
+      return cairo_image_surface_create_from_png_stream (
+        cairocffi_cursor_read, &cursor);
+    }
+
+    /* Measure length texts, each followed by a NUL character */
+    static void cairocffi_scaled_font_text_extents_many (
+        cairo_scaled_font_t *scaled_font, const char *utf8, size_t length,
+        cairo_text_extents_t *extents) {
+      size_t i;
+      for (i = 0; i < length; i++) {
+        cairo_scaled_font_text_extents (scaled_font, utf8, &extents[i]);
+        utf8 += strlen (utf8) + 1;
+      }
+    }
+'''
+
+# Replay display lists, with one case per operation defined in opcodes.py
+# taking only floats and integers
+HELPERS_SOURCE %= '\n'.join(
+    '          case %d: cairo_%s (cr%s); a += %d; break;' % (
+        opcode, name, ''.join(
+            ', %sa[%d]' % ('(int) ' if type_ == 'i' else '', i)
+            for i, type_ in enumerate(types)),
+        len(types))
+    for opcode, (name, types) in enumerate(opcodes.OPERATIONS)
+    if set(types) <= {'d', 'i'})
+
+ffi = FFI()
+ffi.cdef(constants._CAIRO_HEADERS)
+ffi.cdef(constants._CAIRO_MESH_HEADERS)
+ffi.cdef(constants._CAIRO_REGION_HEADERS)
+ffi.cdef(constants._CAIRO_PDF_HEADERS)
+ffi.cdef(constants._CAIRO_PS_HEADERS)
+ffi.cdef(constants._CAIRO_SVG_HEADERS)
+if sys.platform == 'win32':  # pragma: no cover
+    C_SOURCE += '#include <cairo-win32.h>\n'
+    ffi.cdef(constants._CAIRO_WIN32_HEADERS.replace(
+        'typedef void LOGFONTW;', 'typedef ... LOGFONTW;'))
+ffi.cdef(HELPERS_HEADERS)
+ffi.set_source(
+    'cairocffi._cairocffi', C_SOURCE + HELPERS_SOURCE, libraries=['cairo'])
+
+
+def build():
+    """Compile the extension, and return whether it has been built.
+
+    Compilation errors are reported but not raised: cairocffi then keeps
+    parsing declarations and loading cairo at import time.
+
+    """
+    try:
+        ffi.compile(tmpdir=str(Path(__file__).parent.parent), verbose=True)
+    except VerificationError as exception:
+        print(
+            'Compiled bindings have not been built, cairocffi will parse '
+            'declarations at import time instead.\n%s' % exception,
+            file=sys.stderr)
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    build()
@@ -9,7 +9,11 @@
 
 """
 
+from array import array
+from collections import OrderedDict
+
 from . import _check_status, _keepref, cairo, constants, ffi
+from .ffi import lib
 from .matrix import Matrix
 
 
@@ -121,9 +125,16 @@ class ScaledFont(object):
         The :class:`FontOptions` object to use
         when getting metrics for the font and rendering with it.
         If omitted, the default options are assumed.
+    :param glyph_cache_size:
+        The size of the cache of :meth:`text_to_glyphs`,
+        see :meth:`set_glyph_cache_size`.
+    :param text_extents_cache_size:
+        The size of the cache of :meth:`text_extents`,
+        see :meth:`set_text_extents_cache_size`.
 
     """
-    def __init__(self, font_face, font_matrix=None, ctm=None, options=None):
+    def __init__(self, font_face, font_matrix=None, ctm=None, options=None,
+                 glyph_cache_size=0, text_extents_cache_size=0):
         if font_matrix is None:
             font_matrix = Matrix()
             font_matrix.scale(10)  # Default font size
@@ -134,11 +145,24 @@ class ScaledFont(object):
         self._init_pointer(cairo.cairo_scaled_font_create(
             font_face._pointer, font_matrix._pointer,
             ctm._pointer, options._pointer))
+        self.set_glyph_cache_size(glyph_cache_size)
+        self.set_text_extents_cache_size(text_extents_cache_size)
 
     def _init_pointer(self, pointer):
         self._pointer = ffi.gc(
             pointer, _keepref(cairo, cairo.cairo_scaled_font_destroy))
         self._check_status()
+        # Glyph runs at the origin, keyed by (text, with_clusters), None when
+        # disabled. Least recently used runs come first.
+        self._glyph_cache = None
+        self._glyph_cache_size = 0
+        self.glyph_cache_hits = 0
+        self.glyph_cache_misses = 0
+        # Extents keyed by text, None when disabled
+        self._text_extents_cache = None
+        self._text_extents_cache_size = 0
+        self.text_extents_cache_hits = 0
+        self.text_extents_cache_misses = 0
 
     def _check_status(self):
         _check_status(cairo.cairo_scaled_font_status(self._pointer))
@@ -190,10 +214,10 @@ class ScaledFont(object):
         :returns: A new :class:`Matrix` object.
 
         """
-        matrix = Matrix()
-        cairo.cairo_scaled_font_get_font_matrix(self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_scaled_font_get_font_matrix(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
     def get_ctm(self):
         """Copies the scaled font’s font current transform matrix.
@@ -205,10 +229,10 @@ class ScaledFont(object):
         :returns: A new :class:`Matrix` object.
 
         """
-        matrix = Matrix()
-        cairo.cairo_scaled_font_get_ctm(self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_scaled_font_get_ctm(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
     def get_scale_matrix(self):
         """Copies the scaled font’s scaled matrix.
@@ -220,11 +244,10 @@ class ScaledFont(object):
         :returns: A new :class:`Matrix` object.
 
         """
-        matrix = Matrix()
-        cairo.cairo_scaled_font_get_scale_matrix(
-            self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_scaled_font_get_scale_matrix(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
     def extents(self):
         """Return the scaled font’s extents.
@@ -259,6 +282,22 @@ class ScaledFont(object):
             See :meth:`Context.text_extents` for details.
 
         """
+        cache = self._text_extents_cache
+        if cache is None:
+            return self._text_extents(text)
+        extents = cache.get(text)
+        if extents is None:
+            self.text_extents_cache_misses += 1
+            extents = cache[text] = self._text_extents(text)
+            if len(cache) > self._text_extents_cache_size:
+                cache.popitem(last=False)
+        else:
+            self.text_extents_cache_hits += 1
+            cache.move_to_end(text)
+        return extents
+
+    def _text_extents(self, text):
+        """Call cairo for :meth:`text_extents`."""
         extents = ffi.new('cairo_text_extents_t *')
         cairo.cairo_scaled_font_text_extents(
             self._pointer, _encode_string(text), extents)
@@ -268,6 +307,52 @@ class ScaledFont(object):
             extents.width, extents.height,
             extents.x_advance, extents.y_advance)
 
+    def text_extents_many(self, texts):
+        """Returns the extents for many strings of text.
+
+        Texts are encoded together, and the extents are written
+        in one array of floats.
+        With compiled bindings, texts are measured in a loop in C.
+        Unlike :meth:`text_extents`, the cache of extents is not used.
+
+        :param texts:
+            An iterable of texts to measure,
+            as Unicode or UTF-8 strings.
+        :returns:
+            An :class:`array.array` of floats,
+            with the six values returned by :meth:`text_extents`
+            for each text, one text after the other.
+            It can be used as a NumPy array of shape ``(len(texts), 6)``
+            with ``numpy.frombuffer(result).reshape(-1, 6)``.
+
+        """
+        texts = list(texts)
+        result = array('d', [0]) * (6 * len(texts))
+        if not texts:
+            return result
+        try:
+            utf8 = '\0'.join(texts).encode('utf8') + b'\0'
+        except TypeError:  # Some texts are already encoded
+            utf8 = b'\0'.join(
+                text if isinstance(text, bytes) else text.encode('utf8')
+                for text in texts) + b'\0'
+        if utf8.count(b'\0') != len(texts):
+            # Texts are cut at NUL characters by cairo, remove what follows
+            utf8 = b''.join(
+                (text if isinstance(text, bytes) else text.encode('utf8'))
+                .split(b'\0', 1)[0] + b'\0' for text in texts)
+
+        extents = ffi.cast('cairo_text_extents_t *', ffi.from_buffer(result))
+        if lib is None:
+            for i, text in enumerate(utf8.split(b'\0')[:-1]):
+                cairo.cairo_scaled_font_text_extents(
+                    self._pointer, text, extents + i)
+        else:
+            lib.cairocffi_scaled_font_text_extents_many(
+                self._pointer, ffi.from_buffer(utf8), len(texts), extents)
+        self._check_status()
+        return result
+
     def glyph_extents(self, glyphs):
         """Returns the extents for a list of glyphs.
 
@@ -298,6 +383,62 @@ class ScaledFont(object):
             extents.width, extents.height,
             extents.x_advance, extents.y_advance)
 
+    def set_text_extents_cache_size(self, size):
+        """Enable, resize or disable the cache of :meth:`text_extents`.
+
+        When enabled, extents are kept
+        for the last ``size`` different texts.
+        The least recently used extents are dropped when the cache is full.
+        The number of calls using the cache
+        and the number of calls that had to ask cairo
+        are given by the ``text_extents_cache_hits``
+        and ``text_extents_cache_misses`` attributes.
+
+        :type size: int
+        :param size:
+            The maximum number of texts in the cache,
+            or 0 to disable and clear the cache.
+
+        """
+        self._text_extents_cache_size = size
+        if size <= 0:
+            self._text_extents_cache = None
+            return
+        if self._text_extents_cache is None:
+            self._text_extents_cache = OrderedDict()
+        while len(self._text_extents_cache) > size:
+            self._text_extents_cache.popitem(last=False)
+
+    def set_glyph_cache_size(self, size):
+        """Enable, resize or disable the cache of :meth:`text_to_glyphs`.
+
+        When enabled, glyph runs are kept at the origin
+        for the last ``size`` different ``(text, with_clusters)`` values,
+        and translated to the requested position.
+        Positions may differ from the ones given by cairo
+        by rounding errors.
+        The least recently used runs are dropped when the cache is full.
+
+        The number of calls using the cache
+        and the number of calls that had to ask cairo
+        are given by the ``glyph_cache_hits``
+        and ``glyph_cache_misses`` attributes.
+
+        :type size: int
+        :param size:
+            The maximum number of glyph runs in the cache,
+            or 0 to disable and clear the cache.
+
+        """
+        self._glyph_cache_size = size
+        if size <= 0:
+            self._glyph_cache = None
+            return
+        if self._glyph_cache is None:
+            self._glyph_cache = OrderedDict()
+        while len(self._glyph_cache) > size:
+            self._glyph_cache.popitem(last=False)
+
     def text_to_glyphs(self, x, y, text, with_clusters):
         """Converts a string of text to a list of glyphs,
         optionally with cluster mapping,
@@ -333,6 +474,31 @@ class ScaledFont(object):
             for the "real" text display API in cairo.
 
         """
+        cache = self._glyph_cache
+        if cache is None:
+            return self._text_to_glyphs(x, y, text, with_clusters)
+
+        key = (text, bool(with_clusters))
+        run = cache.get(key)
+        if run is None:
+            self.glyph_cache_misses += 1
+            run = cache[key] = self._text_to_glyphs(0, 0, text, with_clusters)
+            if len(cache) > self._glyph_cache_size:
+                cache.popitem(last=False)
+        else:
+            self.glyph_cache_hits += 1
+            cache.move_to_end(key)
+        glyphs = run[0] if with_clusters else run
+        glyphs = [
+            (index, glyph_x + x, glyph_y + y)
+            for index, glyph_x, glyph_y in glyphs]
+        if with_clusters:
+            return glyphs, list(run[1]), run[2]
+        else:
+            return glyphs
+
+    def _text_to_glyphs(self, x, y, text, with_clusters):
+        """Call cairo for :meth:`text_to_glyphs`."""
         glyphs = ffi.new('cairo_glyph_t **', ffi.NULL)
         num_glyphs = ffi.new('int *')
         if with_clusters:
@@ -9,7 +9,11 @@
 
 """
 
-from . import _check_status, cairo, ffi
+from array import array
+from math import cos, isfinite, sin
+
+from . import _as_doubles, _check_status, constants, ffi
+from .ffi import lib
 
 
 class Matrix(object):
@@ -35,10 +39,34 @@ class Matrix(object):
     Matrices can be compared with ``m1 == m2`` and ``m2 != m2``
     as well as multiplied with ``m3 = m1 * m2``.
 
+    The components are stored as Python floats, available as read-write
+    attributes, and computations are done in Python, following cairo.
+    A ``cairo_matrix_t`` is only created when the matrix is given to cairo.
+
     """
+    __slots__ = ('x0', 'xx', 'xy', 'y0', 'yx', 'yy')
+
     def __init__(self, xx=1, yx=0, xy=0, yy=1, x0=0, y0=0):
-        self._pointer = ffi.new('cairo_matrix_t *')
-        cairo.cairo_matrix_init(self._pointer, xx, yx, xy, yy, x0, y0)
+        self.xx, self.yx, self.xy, self.yy, self.x0, self.y0 = (
+            float(xx), float(yx), float(xy), float(yy), float(x0), float(y0))
+
+    @classmethod
+    def _from_pointer(cls, pointer):
+        """Return a new :class:`Matrix` with the components
+        of a ``cairo_matrix_t *`` cdata pointer.
+
+        """
+        return cls(
+            pointer.xx, pointer.yx, pointer.xy, pointer.yy,
+            pointer.x0, pointer.y0)
+
+    @property
+    def _pointer(self):
+        """A new ``cairo_matrix_t *`` cdata pointer
+        with the components of this matrix.
+
+        """
+        return ffi.new('cairo_matrix_t *', self.as_tuple())
 
     @classmethod
     def init_rotate(cls, radians):
@@ -55,9 +83,8 @@ class Matrix(object):
             positive angles rotate in a clockwise direction.
 
         """
-        result = cls()
-        cairo.cairo_matrix_init_rotate(result._pointer, radians)
-        return result
+        s, c = sin(radians), cos(radians)
+        return cls(c, s, -s, c, 0, 0)
 
     def as_tuple(self):
         """Return all of the matrix’s components.
@@ -65,16 +92,14 @@ class Matrix(object):
         :returns: A ``(xx, yx, xy, yy, x0, y0)`` tuple of floats.
 
         """
-        ptr = self._pointer
-        return (ptr.xx, ptr.yx, ptr.xy, ptr.yy, ptr.x0, ptr.y0)
+        return (self.xx, self.yx, self.xy, self.yy, self.x0, self.y0)
 
     def copy(self):
         """Return a new copy of this matrix."""
         return type(self)(*self.as_tuple())
 
     def __getitem__(self, index):
-        return getattr(
-            self._pointer, ('xx', 'yx', 'xy', 'yy', 'x0', 'y0')[index])
+        return self.as_tuple()[index]
 
     def __iter__(self):
         return iter(self.as_tuple())
@@ -96,10 +121,14 @@ class Matrix(object):
         Same as ``self * other``.
 
         """
-        res = Matrix()
-        cairo.cairo_matrix_multiply(
-            res._pointer, self._pointer, other._pointer)
-        return res
+        a, b = self, other
+        return Matrix(
+            a.xx * b.xx + a.yx * b.xy,
+            a.xx * b.yx + a.yx * b.yy,
+            a.xy * b.xx + a.yy * b.xy,
+            a.xy * b.yx + a.yy * b.yy,
+            a.x0 * b.xx + a.y0 * b.xy + b.x0,
+            a.x0 * b.yx + a.y0 * b.yy + b.y0)
 
     __mul__ = multiply
 
@@ -120,7 +149,8 @@ class Matrix(object):
         :type ty: float
 
         """
-        cairo.cairo_matrix_translate(self._pointer, tx, ty)
+        self.x0 += self.xx * tx + self.xy * ty
+        self.y0 += self.yx * tx + self.yy * ty
 
     def scale(self, sx, sy=None):
         """Applies scaling by ``sx``, ``sy``
@@ -144,7 +174,10 @@ class Matrix(object):
         """
         if sy is None:
             sy = sx
-        cairo.cairo_matrix_scale(self._pointer, sx, sy)
+        self.xx *= sx
+        self.yx *= sx
+        self.xy *= sy
+        self.yy *= sy
 
     def rotate(self, radians):
         """Applies a rotation by ``radians``
@@ -167,7 +200,10 @@ class Matrix(object):
             positive angles rotate in a clockwise direction.
 
         """
-        cairo.cairo_matrix_rotate(self._pointer, radians)
+        s, c = sin(radians), cos(radians)
+        self.xx, self.yx, self.xy, self.yy = (
+            c * self.xx + s * self.xy, c * self.yx + s * self.yy,
+            c * self.xy - s * self.xx, c * self.yy - s * self.yx)
 
     def invert(self):
         """Changes matrix to be the inverse of its original value.
@@ -181,7 +217,23 @@ class Matrix(object):
         :raises: :exc:`CairoError` on degenerate matrices.
 
         """
-        _check_status(cairo.cairo_matrix_invert(self._pointer))
+        xx, yx, xy, yy, x0, y0 = self.as_tuple()
+        if xy == 0 and yx == 0:
+            # Scaling and translation only
+            if xx == 0 or yy == 0:
+                _check_status(constants.STATUS_INVALID_MATRIX)
+            self.xx = 1 / xx
+            self.yy = 1 / yy
+            self.x0 = -x0 * self.xx
+            self.y0 = -y0 * self.yy
+            return
+        determinant = xx * yy - yx * xy
+        if determinant == 0 or not isfinite(determinant):
+            _check_status(constants.STATUS_INVALID_MATRIX)
+        inverse = 1 / determinant
+        self.xx, self.yx, self.xy, self.yy, self.x0, self.y0 = (
+            yy * inverse, -yx * inverse, -xy * inverse, xx * inverse,
+            (xy * y0 - yy * x0) * inverse, (yx * x0 - xx * y0) * inverse)
 
     def inverted(self):
         """Return the inverse of this matrix. See :meth:`invert`.
@@ -204,9 +256,9 @@ class Matrix(object):
         :returns: A ``(new_x, new_y)`` tuple of floats.
 
         """
-        xy = ffi.new('double[2]', [x, y])
-        cairo.cairo_matrix_transform_point(self._pointer, xy + 0, xy + 1)
-        return tuple(xy)
+        return (
+            self.xx * x + self.xy * y + self.x0,
+            self.yx * x + self.yy * y + self.y0)
 
     def transform_distance(self, dx, dy):
         """Transforms the distance vector ``(dx, dy)`` by this matrix.
@@ -231,20 +283,82 @@ class Matrix(object):
         :returns: A ``(new_dx, new_dy)`` tuple of floats.
 
         """
-        xy = ffi.new('double[2]', [dx, dy])
-        cairo.cairo_matrix_transform_distance(self._pointer, xy + 0, xy + 1)
-        return tuple(xy)
-
-    def _component_property(name):  # noqa: N805
-        return property(
-            lambda self: getattr(self._pointer, name),
-            lambda self, value: setattr(self._pointer, name, value),
-            doc='Read-write attribute access to a single float component.')
-
-    xx = _component_property('xx')
-    yx = _component_property('yx')
-    xy = _component_property('xy')
-    yy = _component_property('yy')
-    x0 = _component_property('x0')
-    y0 = _component_property('y0')
-    del _component_property
+        return (self.xx * dx + self.xy * dy, self.yx * dx + self.yy * dy)
+
+    def _transform_many(self, points, in_place, distance):
+        """Transform points or distances, see :meth:`transform_points`."""
+        if in_place:
+            view = memoryview(points)
+            if view.readonly or view.format != 'd' or not view.c_contiguous:
+                raise TypeError(
+                    'Points transformed in place must be given as a writable '
+                    'C-contiguous buffer of doubles')
+            coordinates = view.cast('B').cast('d')
+        else:
+            result = array('d')
+            result.frombytes(_as_doubles(points).cast('B'))
+            coordinates = memoryview(result)
+        if len(coordinates) % 2:
+            raise ValueError(
+                'Expected an even number of coordinates, got %d.'
+                % len(coordinates))
+
+        if lib is None:
+            xx, yx, xy, yy, x0, y0 = self.as_tuple()
+            if distance:
+                x0 = y0 = 0
+            xs, ys = coordinates[0::2], coordinates[1::2]
+            new_xs = array('d', [xx * x + xy * y + x0 for x, y in zip(xs, ys)])
+            new_ys = array('d', [yx * x + yy * y + y0 for x, y in zip(xs, ys)])
+            coordinates[0::2], coordinates[1::2] = new_xs, new_ys
+        elif coordinates:
+            transform = (
+                lib.cairocffi_matrix_transform_distances if distance else
+                lib.cairocffi_matrix_transform_points)
+            transform(
+                self._pointer,
+                ffi.cast('double *', ffi.from_buffer(coordinates)),
+                len(coordinates) // 2)
+        return points if in_place else result
+
+    def transform_points(self, points, in_place=False):
+        """Transforms many points by this matrix,
+        like :meth:`transform_point`.
+
+        With compiled bindings, points are transformed in a loop in C.
+
+        :param points:
+            The ``(x, y)`` points,
+            as a C-contiguous buffer of doubles with shape ``(N, 2)``
+            (such as a NumPy array with a ``float64`` dtype
+            or an :class:`array.array` with the ``'d'`` type code),
+            or any other sequence of coordinates
+            or of ``(x, y)`` sequences.
+        :type in_place: bool
+        :param in_place:
+            Whether ``points`` are changed and returned,
+            instead of a new array.
+            ``points`` must then be a writable C-contiguous buffer of doubles.
+        :returns:
+            ``points`` if ``in_place`` is true,
+            or a new :class:`array.array` of doubles
+            with the concatenated coordinates of the transformed points.
+
+        """
+        return self._transform_many(points, in_place, distance=False)
+
+    def transform_distances(self, points, in_place=False):
+        """Transforms many distance vectors by this matrix,
+        like :meth:`transform_distance`.
+
+        :param points:
+            The ``(dx, dy)`` distance vectors,
+            see :meth:`transform_points` for the data structure.
+        :type in_place: bool
+        :param in_place:
+            See :meth:`transform_points`.
+        :returns:
+            See :meth:`transform_points`.
+
+        """
+        return self._transform_many(points, in_place, distance=True)
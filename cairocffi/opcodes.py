@@ -0,0 +1,83 @@
+"""
+    cairocffi.opcodes
+    ~~~~~~~~~~~~~~~~~
+
+    Operations recorded in display lists.
+
+    This module is also used by ``ffi_build.py`` to generate the compiled
+    replay function, it must not import the cairocffi package.
+
+    :copyright: Copyright 2013-2019 by Simon Sapin
+    :license: BSD, see LICENSE for details.
+
+"""
+
+# Context methods that can be recorded, with the types of their arguments:
+# 'd' for floats, 'i' for integers (including enums), 'm' for matrices
+# stored as six floats and 'o' for other objects. The opcode of an operation
+# is its index in this tuple, new operations must be added at the end.
+#
+# Operations with only 'd' and 'i' arguments are replayed by calling the
+# cairo_<name> function with the same arguments, in C with compiled bindings.
+# Others are always replayed in Python, see cairocffi.displaylist.
+OPERATIONS = (
+    ('save', ''),
+    ('restore', ''),
+    ('push_group', ''),
+    ('push_group_with_content', 'i'),
+    ('pop_group_to_source', ''),
+    ('set_source_rgb', 'ddd'),
+    ('set_source_rgba', 'dddd'),
+    ('set_antialias', 'i'),
+    ('set_fill_rule', 'i'),
+    ('set_line_cap', 'i'),
+    ('set_line_join', 'i'),
+    ('set_line_width', 'd'),
+    ('set_miter_limit', 'd'),
+    ('set_operator', 'i'),
+    ('set_tolerance', 'd'),
+    ('translate', 'dd'),
+    ('scale', 'dd'),
+    ('rotate', 'd'),
+    ('identity_matrix', ''),
+    ('new_path', ''),
+    ('new_sub_path', ''),
+    ('move_to', 'dd'),
+    ('rel_move_to', 'dd'),
+    ('line_to', 'dd'),
+    ('rel_line_to', 'dd'),
+    ('rectangle', 'dddd'),
+    ('arc', 'ddddd'),
+    ('arc_negative', 'ddddd'),
+    ('curve_to', 'dddddd'),
+    ('rel_curve_to', 'dddddd'),
+    ('close_path', ''),
+    ('paint', ''),
+    ('paint_with_alpha', 'd'),
+    ('fill', ''),
+    ('fill_preserve', ''),
+    ('stroke', ''),
+    ('stroke_preserve', ''),
+    ('clip', ''),
+    ('clip_preserve', ''),
+    ('reset_clip', ''),
+    ('set_font_size', 'd'),
+    ('show_page', ''),
+    ('copy_page', ''),
+    ('set_dash', 'od'),
+    ('set_matrix', 'm'),
+    ('transform', 'm'),
+    ('append_path', 'o'),
+    ('set_source', 'o'),
+    ('set_source_surface', 'odd'),
+    ('mask', 'o'),
+    ('mask_surface', 'odd'),
+    ('select_font_face', 'oii'),
+    ('set_font_matrix', 'm'),
+    ('show_text', 'o'),
+    ('text_path', 'o'),
+    ('show_glyphs', 'o'),
+    ('glyph_path', 'o'),
+)
+
+OPCODES = {name: opcode for opcode, (name, _) in enumerate(OPERATIONS)}
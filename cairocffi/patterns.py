@@ -147,10 +147,10 @@ class Pattern(object):
         :retuns: A new :class:`Matrix` object.
 
         """
-        matrix = Matrix()
-        cairo.cairo_pattern_get_matrix(self._pointer, matrix._pointer)
+        matrix = ffi.new('cairo_matrix_t *')
+        cairo.cairo_pattern_get_matrix(self._pointer, matrix)
         self._check_status()
-        return matrix
+        return Matrix._from_pointer(matrix)
 
 
 class SolidPattern(Pattern):
@@ -13,30 +13,62 @@ import sys
 from array import array
 from functools import partial
 from io import BytesIO
+from threading import Lock
 
 from . import Context, ImageSurface, constants, dlopen
 from .ffi import ffi_pixbuf as ffi
 
-__all__ = ['decode_to_image_surface']
+__all__ = ['decode_to_image_surface', 'preload']
 
-gdk_pixbuf = dlopen(
-    ffi, ('gdk_pixbuf-2.0', 'libgdk_pixbuf-2.0-0'),
-    ('libgdk_pixbuf-2.0.so.0', 'libgdk_pixbuf-2.0.0.dylib',
-     'libgdk_pixbuf-2.0-0.dll'))
-gobject = dlopen(
-    ffi, ('gobject-2.0', 'libgobject-2.0-0'),
-    ('libgobject-2.0.so.0', 'libgobject-2.0.dylib', 'libgobject-2.0-0.dll'))
-glib = dlopen(
-    ffi, ('glib-2.0', 'libglib-2.0-0'),
-    ('libglib-2.0.so.0', 'libglib-2.0.dylib', 'libglib-2.0-0.dll'))
-try:
-    gdk = dlopen(
-        ffi, ('gdk-3', 'libgdk-3-0'),
-        ('libgdk-3.so.0', 'libgdk-3.0.dylib', 'libgdk-3-0.dll'))
-except OSError:
-    gdk = None
+# Libraries are loaded on first use, see preload()
+LIBRARY_NAMES = ('gdk_pixbuf', 'gobject', 'glib', 'gdk')
+libraries_lock = Lock()
 
-gobject.g_type_init()
+
+def preload():
+    """Load GDK-PixBuf, GObject, GLib and GDK if they are not loaded yet.
+
+    Libraries are automatically loaded the first time an image is decoded.
+    Calling this function before is useful for example in servers
+    forking worker processes, so that libraries are only loaded once
+    in the parent process.
+
+    :raises: :exc:`OSError` if a required library can't be loaded.
+
+    """
+    global gdk_pixbuf, gobject, glib, gdk
+    if 'gdk' in globals():
+        return
+    with libraries_lock:
+        if 'gdk' in globals():
+            return
+        gdk_pixbuf = dlopen(
+            ffi, ('gdk_pixbuf-2.0', 'libgdk_pixbuf-2.0-0'),
+            ('libgdk_pixbuf-2.0.so.0', 'libgdk_pixbuf-2.0.0.dylib',
+             'libgdk_pixbuf-2.0-0.dll'))
+        gobject = dlopen(
+            ffi, ('gobject-2.0', 'libgobject-2.0-0'),
+            ('libgobject-2.0.so.0', 'libgobject-2.0.dylib',
+             'libgobject-2.0-0.dll'))
+        glib = dlopen(
+            ffi, ('glib-2.0', 'libglib-2.0-0'),
+            ('libglib-2.0.so.0', 'libglib-2.0.dylib', 'libglib-2.0-0.dll'))
+        gobject.g_type_init()
+        # Set last, as its presence means that all libraries are loaded
+        try:
+            gdk = dlopen(
+                ffi, ('gdk-3', 'libgdk-3-0'),
+                ('libgdk-3.so.0', 'libgdk-3.0.dylib', 'libgdk-3-0.dll'))
+        except OSError:
+            gdk = None
+
+
+def __getattr__(name):
+    if name in LIBRARY_NAMES:
+        preload()
+        return globals()[name]
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name))
 
 
 class ImageLoadingError(ValueError):
@@ -90,6 +122,7 @@ def decode_to_pixbuf(image_data, width=None, height=None):
         or in an unsupported format.
 
     """
+    preload()
     loader = ffi.gc(
         gdk_pixbuf.gdk_pixbuf_loader_new(), gobject.g_object_unref)
     error = ffi.new('GError **')
@@ -142,7 +175,7 @@ def pixbuf_to_cairo_gdk(pixbuf):
     """
     dummy_context = Context(ImageSurface(constants.FORMAT_ARGB32, 1, 1))
     gdk.gdk_cairo_set_source_pixbuf(
-        dummy_context._pointer, pixbuf._pointer, 0, 0)
+        ffi.cast('cairo_t *', dummy_context._pointer), pixbuf._pointer, 0, 0)
     return dummy_context.get_source().get_surface()
 
 
@@ -14,12 +14,13 @@ import io
 import operator
 import os
 import sys
-import weakref
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
 from . import _check_status, _keepref, cairo, constants, ffi
+from .ffi import lib
 from .fonts import FontOptions, _encode_string
 
 SURFACE_TARGET_KEY = ffi.new('cairo_user_data_key_t *')
@@ -37,6 +38,21 @@ def _make_read_func(file_obj):
     return read_func
 
 
+def _make_buffer_read_func(data):
+    """Return a CFFI callback that reads from a ``char[]`` cdata buffer."""
+    position = 0
+
+    @ffi.callback("cairo_read_func_t", error=constants.STATUS_READ_ERROR)
+    def read_func(_closure, buffer, length):
+        nonlocal position
+        if position + length > len(data):  # EOF too early
+            return constants.STATUS_READ_ERROR
+        ffi.memmove(buffer, data + position, length)
+        position += length
+        return constants.STATUS_SUCCESS
+    return read_func
+
+
 def _make_write_func(file_obj):
     """Return a CFFI callback that writes to a file-like object."""
     if file_obj is None:
@@ -95,11 +111,14 @@ def from_buffer(obj):
 
 class KeepAlive(object):
     """
-    Keep some objects alive until a callback is called.
+    Keep some objects alive until cairo calls a destroy function.
     :attr:`closure` is a tuple of cairo_destroy_func_t and void* cdata objects,
     as expected by cairo_surface_set_mime_data().
 
-    Either :meth:`save` must be called before the callback,
+    The destroy function is shared by all instances,
+    the void* pointer is a handle to the instance.
+
+    Either :meth:`save` must be called before the destroy function,
     or none of them must be called.
 
     """
@@ -107,23 +126,31 @@ class KeepAlive(object):
 
     def __init__(self, *objects):
         self.objects = objects
-        weakself = weakref.ref(self)
-
-        def closure(_):
-            value = weakself()
-            if value is not None:
-                value.instances.remove(value)
-
-        callback = ffi.callback(
-            'cairo_destroy_func_t', closure)
-        # cairo wants a non-NULL closure pointer.
-        self.closure = (callback, callback)
+        self.closure = (_destroy_func, ffi.new_handle(self))
 
     def save(self):
         """Start keeping a reference to the passed objects."""
         self.instances.add(self)
 
 
+def _destroy(handle):
+    """Stop keeping the objects of the :class:`KeepAlive` ``handle``."""
+    keep_alive = ffi.from_handle(handle)
+    KeepAlive.instances.discard(keep_alive)
+    # Break the reference cycle between the instance and its handle,
+    # so that objects are released without waiting for garbage collection
+    keep_alive.closure = None
+
+
+# A single destroy function for all KeepAlive instances, as creating
+# callbacks is slow and their number is limited on some platforms
+if lib is not None:  # pragma: no cover
+    ffi.def_extern('cairocffi_destroy')(_destroy)
+    _destroy_func = lib.cairocffi_destroy
+else:
+    _destroy_func = ffi.callback('cairo_destroy_func_t', _destroy)
+
+
 class Surface(object):
     """The base class for all surface types.
 
@@ -162,8 +189,9 @@ class Surface(object):
             is_empty = target_keep_alive in (None, ffi.NULL)
         if not is_empty:
             keep_alive = KeepAlive(target_keep_alive)
+            destroy, handle = keep_alive.closure
             _check_status(cairo.cairo_surface_set_user_data(
-                self._pointer, SURFACE_TARGET_KEY, *keep_alive.closure))
+                self._pointer, SURFACE_TARGET_KEY, handle, destroy))
             keep_alive.save()
 
     def _check_status(self):
@@ -492,7 +520,15 @@ class Surface(object):
         Use this method with care.
 
         :param str mime_type: The MIME type of the image data.
-        :param bytes data: The image data to attach to the surface.
+        :param data:
+            The image data to attach to the surface,
+            as a byte string or any other object
+            supporting the buffer protocol,
+            such as a :class:`bytearray` or a :class:`mmap.mmap`
+            for a memory-mapped file.
+            The data is not copied (unless the buffer is not contiguous),
+            the object is kept alive and must not be modified
+            until cairo doesn't use it anymore.
 
         *New in cairo 1.10.*
 
@@ -502,13 +538,19 @@ class Surface(object):
             _check_status(cairo.cairo_surface_set_mime_data(
                 self._pointer, mime_type, ffi.NULL, 0, ffi.NULL, ffi.NULL))
         else:
-            # TODO: avoid making a copy here if possible.
-            length = len(data)
-            data = ffi.new('unsigned char[]', data)
-            keep_alive = KeepAlive(data, mime_type)
+            try:
+                # Keeps data alive and its buffer exported
+                buffer = ffi.from_buffer(data)
+            except BufferError:
+                # Non-contiguous buffers, copied
+                buffer = ffi.from_buffer(bytes(data))
+            except TypeError:
+                # Sequences of integers, copied
+                buffer = ffi.new('unsigned char[]', data)
+            keep_alive = KeepAlive(buffer, mime_type)
             _check_status(cairo.cairo_surface_set_mime_data(
-                self._pointer, mime_type, data, length,
-                *keep_alive.closure))
+                self._pointer, mime_type, ffi.cast('unsigned char *', buffer),
+                len(buffer), *keep_alive.closure))
             keep_alive.save()  # Only on success
 
     def get_mime_data(self, mime_type):
@@ -648,6 +690,20 @@ class Surface(object):
 
         """
         return_bytes = target is None
+        if lib is not None and (return_bytes or hasattr(target, 'write')):
+            # With compiled bindings, the PNG image is accumulated in a C
+            # buffer, without calling Python for each chunk written by cairo
+            buffer = ffi.new('cairocffi_buffer_t *')
+            try:
+                _check_status(lib.cairocffi_surface_write_to_png_buffer(
+                    self._pointer, buffer))
+                data = ffi.buffer(buffer.data, buffer.length)
+                if return_bytes:
+                    return data[:]
+                target.write(data)
+                return
+            finally:
+                lib.cairocffi_buffer_free(buffer)
         if return_bytes:
             target = io.BytesIO()
         if hasattr(target, 'write'):
@@ -770,7 +826,7 @@ class ImageSurface(Surface):
             A filename or
             a binary mode :term:`file object` with a ``read`` method.
             If you already have a byte string in memory,
-            use :class:`io.BytesIO`.
+            use :meth:`create_from_png_bytes`.
         :returns: A new :class:`ImageSurface` instance.
 
         """
@@ -785,6 +841,32 @@ class ImageSurface(Surface):
         Surface.__init__(self, pointer)  # Skip ImageSurface.__init__
         return self
 
+    @classmethod
+    def create_from_png_bytes(cls, data):
+        """Decode a PNG file in memory into a new image surface.
+
+        ``data`` is read in place, without intermediate copies.
+        With compiled bindings,
+        it is read in C with no call to Python during decoding.
+
+        :param data:
+            The PNG file, as a byte string
+            or any other object supporting the buffer protocol.
+        :returns: A new :class:`ImageSurface` instance.
+
+        """
+        data = ffi.from_buffer(data)
+        if lib is not None:
+            pointer = lib.cairocffi_image_surface_create_from_png_buffer(
+                ffi.cast('unsigned char *', data), len(data))
+        else:
+            read_func = _make_buffer_read_func(data)
+            pointer = cairo.cairo_image_surface_create_from_png_stream(
+                read_func, ffi.NULL)
+        self = object.__new__(cls)
+        Surface.__init__(self, pointer)  # Skip ImageSurface.__init__
+        return self
+
     def get_data(self):
         """Return the buffer pointing to the image’s pixel data,
         encoded according to the surface’s :ref:`FORMAT` string.
@@ -1005,9 +1087,11 @@ class PDFSurface(Surface):
         *New in cairo 1.10.*
 
         """
+        # Getting the function first declares cairo_pdf_version_t
+        get_versions = cairo.cairo_pdf_get_versions
         versions = ffi.new('cairo_pdf_version_t const **')
         num_versions = ffi.new('int *')
-        cairo.cairo_pdf_get_versions(versions, num_versions)
+        get_versions(versions, num_versions)
         versions = versions[0]
         return [versions[i] for i in range(num_versions[0])]
 
@@ -1245,9 +1329,11 @@ class PSSurface(Surface):
         :return: A list of :ref:`PS_LEVEL` strings.
 
         """
+        # Getting the function first declares cairo_ps_level_t
+        get_levels = cairo.cairo_ps_get_levels
         levels = ffi.new('cairo_ps_level_t const **')
         num_levels = ffi.new('int *')
-        cairo.cairo_ps_get_levels(levels, num_levels)
+        get_levels(levels, num_levels)
         levels = levels[0]
         return [levels[i] for i in range(num_levels[0])]
 
@@ -1385,9 +1471,11 @@ class SVGSurface(Surface):
         :return: A list of :ref:`SVG_VERSION` strings.
 
         """
+        # Getting the function first declares cairo_svg_version_t
+        get_versions = cairo.cairo_svg_get_versions
         versions = ffi.new('cairo_svg_version_t const **')
         num_versions = ffi.new('int *')
-        cairo.cairo_svg_get_versions(versions, num_versions)
+        get_versions(versions, num_versions)
         versions = versions[0]
         return [versions[i] for i in range(num_versions[0])]
 
@@ -1543,3 +1631,59 @@ SURFACE_TYPE_TO_CLASS = {
     constants.SURFACE_TYPE_WIN32: Win32Surface,
     constants.SURFACE_TYPE_WIN32_PRINTING: Win32PrintingSurface
 }
+
+
+def write_many_to_png(surfaces, targets=None, max_workers=None):
+    """Write the contents of surfaces as PNG images, in parallel threads.
+
+    PNG compression is done by cairo
+    without holding Python's global interpreter lock,
+    the surfaces are thus encoded in parallel on multiple cores
+    by a :class:`~concurrent.futures.ThreadPoolExecutor`.
+
+    :param surfaces: An iterable of :class:`Surface` objects.
+    :param targets:
+        An iterable of targets for :meth:`Surface.write_to_png`,
+        with the same length as ``surfaces``,
+        or :obj:`None` to get the PNG contents of all the surfaces.
+        Targets are filenames, binary mode :term:`file objects <file object>`
+        with a `write` method,
+        or :obj:`None` to get the PNG contents of a surface.
+    :param max_workers:
+        The maximum number of threads used,
+        as given to :class:`~concurrent.futures.ThreadPoolExecutor`.
+    :returns:
+        A list with an item for each surface, in the same order:
+        the value returned by :meth:`Surface.write_to_png`
+        (:obj:`None`, or the PNG contents as a byte string),
+        or the exception raised when writing the surface.
+
+    """
+    surfaces = list(surfaces)
+    targets = [None] * len(surfaces) if targets is None else list(targets)
+    if len(targets) != len(surfaces):
+        raise ValueError('Got %d surfaces and %d targets.' % (
+            len(surfaces), len(targets)))
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(surface.write_to_png, target)
+            for surface, target in zip(surfaces, targets)]
+    return [future.exception() or future.result() for future in futures]
+
+
+def encode_png_many(surfaces, max_workers=None):
+    """Return the contents of surfaces as PNG images, in parallel threads.
+
+    Same as ``write_many_to_png(surfaces, max_workers=max_workers)``.
+
+    :param surfaces: An iterable of :class:`Surface` objects.
+    :param max_workers:
+        The maximum number of threads used,
+        as given to :class:`~concurrent.futures.ThreadPoolExecutor`.
+    :returns:
+        A list with an item for each surface, in the same order:
+        the PNG contents as a byte string,
+        or the exception raised when encoding the surface.
+
+    """
+    return write_many_to_png(surfaces, max_workers=max_workers)
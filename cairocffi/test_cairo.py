@@ -14,9 +14,14 @@ import base64
 import contextlib
 import gc
 import io
+import json
 import math
+import mmap
 import os
+import pathlib
+import pickle
 import shutil
+import subprocess
 import sys
 import tempfile
 
@@ -30,10 +35,11 @@ from . import (  # isort:skip
     PDF_METADATA_KEYWORDS, PDF_METADATA_MOD_DATE, PDF_METADATA_SUBJECT,
     PDF_METADATA_TITLE, PDF_OUTLINE_FLAG_BOLD, PDF_OUTLINE_FLAG_OPEN,
     PDF_OUTLINE_ROOT, SVG_UNIT_PC, SVG_UNIT_PT, SVG_UNIT_PX, SVG_UNIT_USER,
-    TAG_LINK, Context, FontFace, FontOptions, ImageSurface, LinearGradient,
-    Matrix, Pattern, PDFSurface, PSSurface, RadialGradient, RecordingSurface,
-    ScaledFont, SolidPattern, Surface, SurfacePattern, SVGSurface, ToyFontFace,
-    cairo_version, cairo_version_string)
+    TAG_LINK, Context, DisplayList, FontFace, FontOptions, ImageSurface,
+    LinearGradient, Matrix, Path, Pattern, PDFSurface, PSSurface,
+    RadialGradient, RecordingSurface, ScaledFont, SolidPattern, Surface,
+    SurfacePattern, SVGSurface, ToyFontFace, cairo_version,
+    cairo_version_string, encode_png_many, render_tiles, write_many_to_png)
 
 if sys.byteorder == 'little':
     def pixel(argb):  # pragma: no cover
@@ -76,6 +82,40 @@ def test_install_as_pycairo():
     assert cairo is cairocffi
 
 
+def test_dlopen_cache(monkeypatch):
+    with temp_directory() as tempdir:
+        cache = os.path.join(tempdir, 'libraries.json')
+        monkeypatch.setattr(cairocffi, 'library_cache_path', cache)
+        names = ('cairo-2', 'cairo', 'libcairo-2')
+        library = cairocffi.dlopen(cairocffi.ffi, names, ())
+        assert library.cairo_version() == cairo_version()
+        with open(cache) as fd:
+            paths = json.load(fd)
+        assert set(paths) & set(names)
+
+        monkeypatch.setattr(cairocffi, 'find_library', None)
+        library = cairocffi.dlopen(cairocffi.ffi, names, ())
+        assert library.cairo_version() == cairo_version()
+
+        monkeypatch.setattr(cairocffi, 'library_cache_path', '')
+        monkeypatch.setattr(cairocffi, 'library_paths', paths)
+        library = cairocffi.dlopen(cairocffi.ffi, names, ())
+        assert library.cairo_version() == cairo_version()
+
+
+def test_dlopen_cache_no_home(monkeypatch):
+    def home():
+        raise RuntimeError('Could not determine home directory.')
+    monkeypatch.setattr(cairocffi, 'library_cache_path', None)
+    monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+    monkeypatch.setattr(pathlib.Path, 'home', home)
+    assert cairocffi._read_library_cache() == {}
+    cairocffi._write_library_cache({'cairo': 'libcairo.so.2'})
+    names = ('cairo-2', 'cairo', 'libcairo-2')
+    library = cairocffi.dlopen(cairocffi.ffi, names, ())
+    assert library.cairo_version() == cairo_version()
+
+
 def test_image_surface():
     assert ImageSurface.format_stride_for_width(
         cairocffi.FORMAT_ARGB32, 100) == 400
@@ -199,6 +239,20 @@ def test_target_lifetime():
     assert len(cairocffi.surfaces.KeepAlive.instances) == 0
     assert sys.getrefcount(target) == initial_refcount
 
+    data = bytearray(4)
+    initial_refcount = sys.getrefcount(data)
+    surfaces = [
+        ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1, data) for _ in range(100)]
+    assert len(cairocffi.surfaces.KeepAlive.instances) == 100
+    # All surfaces share the same destroy function
+    assert len({
+        keep_alive.closure[0]
+        for keep_alive in cairocffi.surfaces.KeepAlive.instances}) == 1
+    del surfaces
+    gc.collect()
+    assert len(cairocffi.surfaces.KeepAlive.instances) == 0
+    assert sys.getrefcount(data) == initial_refcount
+
 
 @pytest.mark.xfail(cairo_version() < 11000,
                    reason='Cairo version too low')
@@ -211,6 +265,29 @@ def test_mime_data():
     assert len(cairocffi.surfaces.KeepAlive.instances) == 1
     assert surface.get_mime_data('image/jpeg')[:] == b'lol'
 
+    surface.set_mime_data('image/jpeg', None)
+    assert len(cairocffi.surfaces.KeepAlive.instances) == 0
+
+    # Buffers are not copied
+    data = bytearray(b'lol')
+    surface.set_mime_data('image/jpeg', data)
+    data[0:1] = b'j'
+    assert surface.get_mime_data('image/jpeg')[:] == b'jol'
+    with pytest.raises(BufferError):
+        data.extend(b'!')
+    with tempfile.TemporaryFile() as fd:
+        fd.write(b'mapped')
+        fd.flush()
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            surface.set_mime_data('image/jpeg', mapped)
+            assert surface.get_mime_data('image/jpeg')[:] == b'mapped'
+            surface.set_mime_data('image/jpeg', [1, 2, 3])
+            gc.collect()
+    assert surface.get_mime_data('image/jpeg')[:] == b'\x01\x02\x03'
+    surface.set_mime_data('image/jpeg', memoryview(b'lol')[1:])
+    assert surface.get_mime_data('image/jpeg')[:] == b'ol'
+    surface.set_mime_data('image/jpeg', memoryview(b'lloll')[::2])
+    assert surface.get_mime_data('image/jpeg')[:] == b'lol'
     surface.set_mime_data('image/jpeg', None)
     assert len(cairocffi.surfaces.KeepAlive.instances) == 0
     if cairo_version() >= 11200:
@@ -398,6 +475,94 @@ def test_png():
         surface = ImageSurface.create_from_png(io.BytesIO(b''))
 
 
+def test_png_bytes():
+    png_bytes = base64.b64decode(
+        b'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVQI12O'
+        b'w69x7BgAE3gJRgNit0AAAAABJRU5ErkJggg==')
+    for source in [png_bytes, bytearray(png_bytes), memoryview(png_bytes)]:
+        surface = ImageSurface.create_from_png_bytes(source)
+        assert surface.get_format() == cairocffi.FORMAT_ARGB32
+        assert surface.get_width() == 1
+        assert surface.get_height() == 1
+        assert surface.get_stride() == 4
+        assert surface.get_data()[:] == pixel(b'\xcc\x32\x6e\x97')
+
+    with pytest.raises(IOError):
+        # Truncated input
+        ImageSurface.create_from_png_bytes(png_bytes[:30])
+    with pytest.raises(IOError):
+        ImageSurface.create_from_png_bytes(b'')
+
+
+def test_png_big():
+    # Bigger than the initial buffer of compiled bindings
+    surface = ImageSurface(cairocffi.FORMAT_RGB24, 300, 200)
+    context = Context(surface)
+    for i in range(0, 300, 3):
+        context.set_source_rgb(i / 300, (i * 7 % 300) / 300, .5)
+        context.rectangle(i, 0, 2, 200)
+        context.fill()
+    with temp_directory() as tempdir:
+        filename = os.path.join(tempdir, 'foo.png')
+        surface.write_to_png(filename)
+        with open(filename, 'rb') as fd:
+            written_png_bytes = fd.read()
+    assert len(written_png_bytes) > 4096
+    assert surface.write_to_png() == written_png_bytes
+    file_obj = io.BytesIO()
+    surface.write_to_png(file_obj)
+    assert file_obj.getvalue() == written_png_bytes
+
+
+def test_backend_headers():
+    from .ffi import cdef_backend, lib
+    assert cdef_backend('region')
+    assert not cdef_backend('unknown')
+    # Quartz declarations are not included in compiled bindings
+    assert cdef_backend('quartz') == (lib is None)
+    region = cairocffi.cairo.cairo_region_create()
+    assert cairocffi.cairo.cairo_region_is_empty(region)
+    cairocffi.cairo.cairo_region_destroy(region)
+    assert cairocffi.ffi.new('cairo_region_overlap_t *')[0] == (
+        cairocffi.REGION_OVERLAP_IN)
+
+
+def test_import_lazy_backends():
+    # Backends already used in this process are loaded, import in another one
+    code = (
+        'import cairocffi; from cairocffi.ffi import lib, loaded_backends; '
+        'assert lib is not None or not loaded_backends, loaded_backends; '
+        'assert "xcb" not in loaded_backends')
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_write_many_to_png():
+    surfaces = [
+        ImageSurface(cairocffi.FORMAT_ARGB32, width, 1)
+        for width in range(1, 6)]
+    expected = [surface.write_to_png() for surface in surfaces]
+    assert encode_png_many(surfaces, max_workers=2) == expected
+
+    finished = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    finished.finish()
+    file_obj = io.BytesIO()
+    with temp_directory() as tempdir:
+        filename = os.path.join(tempdir, 'foo.png')
+        results = write_many_to_png(
+            [surfaces[0], finished, surfaces[1], surfaces[2]],
+            [filename, None, file_obj, None])
+        with open(filename, 'rb') as fd:
+            assert fd.read() == expected[0]
+    assert results[0] is None
+    assert isinstance(results[1], cairocffi.CairoError)
+    assert results[2] is None
+    assert file_obj.getvalue() == expected[1]
+    assert results[3] == expected[2]
+
+    with pytest.raises(ValueError):
+        write_many_to_png(surfaces, [None])
+
+
 @pytest.mark.xfail(cairo_version() < 11000,
                    reason='Cairo version too low')
 def test_pdf_versions():
@@ -590,6 +755,18 @@ def test_matrix():
 
     assert m.transform_distance(1, 2) == (2, 6)
     assert m.transform_point(1, 2) == (14, 10)
+    assert m.transform_distances([(1, 2), (0, 0)]) == array.array(
+        'd', [2, 6, 0, 0])
+    assert m.transform_points([1, 2, 0, 0]) == array.array(
+        'd', [14, 10, 12, 4])
+    points = array.array('d', [1, 2, 0, 0])
+    assert m.transform_points(points, in_place=True) is points
+    assert points == array.array('d', [14, 10, 12, 4])
+    assert m.transform_points([]) == array.array('d')
+    with pytest.raises(TypeError):
+        m.transform_points([1, 2], in_place=True)
+    with pytest.raises(ValueError):
+        m.transform_points([1, 2, 3])
 
     m2 = m.copy()
     assert m2 == m
@@ -610,6 +787,16 @@ def test_matrix():
     m *= Matrix.init_rotate(math.pi)
     assert round_tuple(m.as_tuple()) == (0, -3,  2, 0,  -12, -4)
 
+    m = Matrix(2, 1, 3, 7, 8, 2)
+    assert round_tuple((m * m.inverted()).as_tuple()) == (1, 0, 0, 1, 0, 0)
+    assert Matrix._from_pointer(m._pointer) == m
+    with pytest.raises(cairocffi.CairoError):
+        Matrix(1, 2, 2, 4).invert()
+    with pytest.raises(cairocffi.CairoError):
+        Matrix(0, 0, 0, 1).invert()
+    with pytest.raises(AttributeError):
+        m.some_inexistent_attribute = 1
+
 
 def test_surface_pattern():
     surface = ImageSurface(cairocffi.FORMAT_A1, 1, 1)
@@ -792,6 +979,15 @@ def test_context_current_transform_matrix():
     assert context.user_to_device(1, 2) == (14, 10)
     assert context.device_to_user_distance(2, 6) == (1, 2)
     assert round_tuple(context.device_to_user(14, 10)) == (1, 2)
+    assert context.user_to_device_distance_many([1, 2]) == array.array(
+        'd', [2, 6])
+    assert context.user_to_device_many([(1, 2)]) == array.array(
+        'd', [14, 10])
+    assert context.device_to_user_distance_many([2, 6]) == array.array(
+        'd', [1, 2])
+    points = array.array('d', [14, 10])
+    context.device_to_user_many(points, in_place=True)
+    assert round_tuple(points) == (1, 2)
 
 
 def test_context_path():
@@ -888,6 +1084,247 @@ def test_context_path():
         context.append_path([(cairocffi.PATH_LINE_TO, (30, 150, 1, 4))])
 
 
+def test_context_append_path_buffers():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface)
+    path = [
+        (cairocffi.PATH_MOVE_TO, (10, 20)),
+        (cairocffi.PATH_CURVE_TO, (30, 40, 50, 60, 70, 80)),
+        (cairocffi.PATH_LINE_TO, (90, 100)),
+        (cairocffi.PATH_LINE_TO, (110, 120))]
+    types = array.array('i', [path_type for path_type, _ in path])
+    coordinates = [value for _, points in path for value in points]
+
+    context.append_path((types, coordinates))
+    assert context.copy_path() == path
+    context.new_path()
+    context.append_path((types, array.array('d', coordinates)))
+    assert context.copy_path() == path
+    with pytest.raises(ValueError):
+        context.append_path((types, coordinates[:-1]))
+
+    # Buffer of cairo_path_data_t, with 16 bytes per item
+    data = bytearray(16 * 4)
+    ints = memoryview(data).cast('i')
+    doubles = memoryview(data).cast('d')
+    ints[0:2] = array.array('i', [cairocffi.PATH_MOVE_TO, 2])
+    doubles[2:4] = array.array('d', [1, 2])
+    ints[8:10] = array.array('i', [cairocffi.PATH_LINE_TO, 2])
+    doubles[6:8] = array.array('d', [3, 4])
+    context.new_path()
+    context.append_path(data)
+    assert context.copy_path() == [
+        (cairocffi.PATH_MOVE_TO, (1, 2)),
+        (cairocffi.PATH_LINE_TO, (3, 4))]
+    with pytest.raises(ValueError):
+        context.append_path(data[:-1])
+    with pytest.raises(ValueError):
+        # Truncated line, cairo would read after the end of the buffer
+        context.append_path(data[:16 * 3])
+    ints[9] = 4
+    with pytest.raises(ValueError):
+        context.append_path(data)
+    ints[8:10] = array.array('i', [42, 2])
+    with pytest.raises(ValueError):
+        context.append_path(data)
+
+
+def test_context_append_path_large():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface)
+    length = 100000
+    points = array.array('d', range(2 * length))
+
+    def per_call_data(draw):
+        context.new_path()
+        draw()
+        return context.copy_path(as_object=True).data.tobytes()
+
+    def draw_lines():
+        context.move_to(0, 1)
+        for i in range(1, length):
+            context.line_to(points[2 * i], points[2 * i + 1])
+        context.close_path()
+    expected = per_call_data(draw_lines)
+    assert per_call_data(lambda: context.polyline(points, close=True)) == (
+        expected)
+    types = array.array('i', [cairocffi.PATH_LINE_TO]) * length
+    types[0] = cairocffi.PATH_MOVE_TO
+    types.append(cairocffi.PATH_CLOSE_PATH)
+    assert per_call_data(
+        lambda: context.append_path((types, points))) == expected
+
+    def draw_rectangles():
+        for i in range(0, len(points), 4):
+            context.rectangle(*points[i:i + 4])
+    expected = per_call_data(draw_rectangles)
+    assert per_call_data(lambda: context.rectangles(points)) == expected
+
+    def draw_curves():
+        for i in range(0, len(points), 10):
+            context.move_to(*points[i:i + 2])
+            context.curve_to(*points[i + 2:i + 6])
+            context.line_to(*points[i + 6:i + 8])
+            context.line_to(*points[i + 8:i + 10])
+        # Break the repeated pattern
+        context.line_to(0, 0)
+    expected = per_call_data(draw_curves)
+    types = array.array('i', [
+        cairocffi.PATH_MOVE_TO, cairocffi.PATH_CURVE_TO,
+        cairocffi.PATH_LINE_TO, cairocffi.PATH_LINE_TO]) * (length // 5)
+    types.append(cairocffi.PATH_LINE_TO)
+    coordinates = points + array.array('d', [0, 0])
+    assert per_call_data(
+        lambda: context.append_path((types, coordinates))) == expected
+    assert per_call_data(lambda: context.append_path(
+        (array.array('q', types), coordinates))) == expected
+
+
+def test_context_path_object():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface)
+
+    path = context.copy_path(as_object=True)
+    assert isinstance(path, Path)
+    assert list(path) == []
+    assert path.data.nbytes == 0
+    assert path.as_arrays() == (array.array('i'), array.array('d'))
+
+    context.move_to(10, 20)
+    context.curve_to(30, 40, 50, 60, 70, 80)
+    context.line_to(90, 100)
+    path = context.copy_path(as_object=True)
+    assert list(path) == context.copy_path()
+    assert path.data.nbytes == 16 * 7
+    assert path.data.readonly
+    types, coordinates = path.as_arrays()
+    assert list(types) == [
+        cairocffi.PATH_MOVE_TO, cairocffi.PATH_CURVE_TO,
+        cairocffi.PATH_LINE_TO]
+    assert list(coordinates) == [10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    flat_path = context.copy_path_flat(as_object=True)
+    assert list(flat_path) == context.copy_path_flat()
+
+    context.new_path()
+    context.append_path(path)
+    assert list(path) == context.copy_path()
+    context.new_path()
+    context.append_path((types, coordinates))
+    assert list(path) == context.copy_path()
+    context.new_path()
+    context.append_path(path.data)
+    assert list(path) == context.copy_path()
+
+
+def test_context_rectangles():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 3, 1)
+    context = Context(surface)
+
+    context.rectangles([])
+    assert context.copy_path() == []
+    context.rectangles([(10, 20, 30, 40), (1, 2, 3, 4)])
+    context.rectangle(10, 20, 30, 40)
+    context.rectangle(1, 2, 3, 4)
+    path = context.copy_path()
+    assert path[:len(path) // 2] == path[len(path) // 2:]
+    assert path[:5] == [
+        (cairocffi.PATH_MOVE_TO, (10, 20)),
+        (cairocffi.PATH_LINE_TO, (40, 20)),
+        (cairocffi.PATH_LINE_TO, (40, 60)),
+        (cairocffi.PATH_LINE_TO, (10, 60)),
+        (cairocffi.PATH_CLOSE_PATH, ())]
+    with pytest.raises(ValueError):
+        context.rectangles([1, 2, 3])
+
+    context.rectangles(
+        array.array('d', [0, 0, 1, 1, 1, 0, 1, 1, 2, 0, 1, 1]),
+        [(1, 0, 0), (0, 0, 1), (1, 0, 0)])
+    assert context.copy_path() == []
+    assert context.get_source().get_rgba() == (0, 0, 0, 1)
+    assert surface.get_data()[:] == (
+        pixel(b'\xff\xff\x00\x00') + pixel(b'\xff\x00\x00\xff') +
+        pixel(b'\xff\xff\x00\x00'))
+    with pytest.raises(ValueError):
+        context.rectangles([(0, 0, 1, 1)], [(1, 0)])
+
+
+def test_context_stamp():
+    marker = [
+        (cairocffi.PATH_MOVE_TO, (-1, -1)),
+        (cairocffi.PATH_LINE_TO, (1, -1)),
+        (cairocffi.PATH_LINE_TO, (1, 1)),
+        (cairocffi.PATH_LINE_TO, (-1, 1)),
+        (cairocffi.PATH_CLOSE_PATH, ())]
+    points = [(2, 2), (6, 5), (3.75, 7.5)]
+
+    reference = ImageSurface(cairocffi.FORMAT_ARGB32, 10, 10)
+    context = Context(reference)
+    context.set_antialias(cairocffi.ANTIALIAS_NONE)
+    context.set_source_rgb(1, 0, 0)
+    context.rectangles([(x - 1, y - 1, 2, 2) for x, y in points])
+    context.fill()
+
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 10, 10)
+    context = Context(surface)
+    context.set_antialias(cairocffi.ANTIALIAS_NONE)
+    context.set_source_rgb(1, 0, 0)
+    context.stamp(marker, points, subpixels=4)
+    assert surface.get_data()[:] == reference.get_data()[:]
+    # Stamps at (0, 0), (0, 0) and (3/4, 2/4) subpixel offsets
+    assert len(context._stamps) == 2
+    context.stamp(marker, array.array('d', [2, 2]), subpixels=4)
+    assert len(context._stamps) == 2
+    assert context.get_matrix() == Matrix()
+
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 10, 10)
+    context = Context(surface)
+    context.set_source_rgb(1, 0, 0)
+    context.scale(2, 2)
+    context.stamp(marker, [(1.5, 1.5)])
+    context.stamp([], [(1.5, 1.5)])
+    context.identity_matrix()
+    context.rectangle(1, 1, 4, 4)
+    context.set_source_rgb(0, 0, 0)
+    context.set_operator(cairocffi.OPERATOR_DEST_OUT)
+    context.fill()
+    assert surface.get_data()[:] == pixel(b'\x00\x00\x00\x00') * 100
+
+    with pytest.raises(ValueError):
+        context.stamp(marker, [1, 2, 3])
+
+
+def test_context_polyline():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface)
+
+    context.polyline([])
+    assert context.copy_path() == []
+    context.polyline([(10, 20), (30, 40), (50, 60)])
+    assert context.copy_path() == [
+        (cairocffi.PATH_MOVE_TO, (10, 20)),
+        (cairocffi.PATH_LINE_TO, (30, 40)),
+        (cairocffi.PATH_LINE_TO, (50, 60))]
+    context.lines_to(array.array('d', [70, 80, 90, 100]))
+    assert context.get_current_point() == (90, 100)
+    assert context.copy_path()[-2:] == [
+        (cairocffi.PATH_LINE_TO, (70, 80)),
+        (cairocffi.PATH_LINE_TO, (90, 100))]
+
+    context.new_path()
+    context.polyline([10, 20, 30, 40, 50, 60], close=True)
+    path = context.copy_path()
+    # Some cairo versions add a MOVE_TO after a CLOSE_PATH
+    if path[-1] == (cairocffi.PATH_MOVE_TO, (10, 20)):  # pragma: no cover
+        path = path[:-1]
+    assert path == [
+        (cairocffi.PATH_MOVE_TO, (10, 20)),
+        (cairocffi.PATH_LINE_TO, (30, 40)),
+        (cairocffi.PATH_LINE_TO, (50, 60)),
+        (cairocffi.PATH_CLOSE_PATH, ())]
+    with pytest.raises(ValueError):
+        context.polyline([10, 20, 30])
+
+
 def test_context_properties():
     surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
     context = Context(surface)
@@ -930,6 +1367,239 @@ def test_context_properties():
     assert context.get_tolerance() == 0.25
 
 
+def test_context_state_cache():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface, state_cache=True)
+    assert context.skipped_state_calls == 0
+
+    assert context.get_line_width() == 2
+    assert context.get_line_width() == 2
+    assert context.skipped_state_calls == 1
+    context.set_line_width(2)
+    assert context.skipped_state_calls == 2
+    context.set_line_width(3)
+    assert context.get_line_width() == 3
+    assert context.skipped_state_calls == 3
+    context.set_line_width(-1)
+    assert context.get_line_width() == 0
+
+    context.set_source_rgb(1, 0, 0)
+    context.set_source_rgba(1, 0, 0, 1)
+    context.set_operator(cairocffi.OPERATOR_XOR)
+    context.set_operator(cairocffi.OPERATOR_XOR)
+    assert context.skipped_state_calls == 6
+
+    with context:
+        context.set_operator(cairocffi.OPERATOR_OVER)
+        context.set_source_rgb(0, 0, 1)
+        assert context.get_operator() == cairocffi.OPERATOR_OVER
+    assert context.get_operator() == cairocffi.OPERATOR_XOR
+    assert context.get_source().get_rgba() == (1, 0, 0, 1)
+
+    context.push_group()
+    context.set_operator(cairocffi.OPERATOR_OVER)
+    context.pop_group_to_source()
+    assert context.get_operator() == cairocffi.OPERATOR_XOR
+    context.set_source_rgb(1, 0, 0)
+    assert context.get_source().get_rgba() == (1, 0, 0, 1)
+
+    context.set_source(SolidPattern(0, 1, 0))
+    context.set_source_rgb(1, 0, 0)
+    assert context.get_source().get_rgba() == (1, 0, 0, 1)
+
+    context = Context(surface)
+    context.set_line_width(2)
+    assert context.get_line_width() == 2
+    assert context.skipped_state_calls == 0
+
+
+def test_context_deferred_errors():
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)
+    context = Context(surface)
+    with context.deferred_errors():
+        context.move_to(0, 0)
+        context.line_to(1, 1)
+        context.stroke()
+    with pytest.raises(cairocffi.CairoError):
+        context.restore()
+
+    # Only the end of the outermost block checks the status
+    context = Context(surface)
+    inner_block_ended = stroked = False
+    with pytest.raises(cairocffi.CairoError):
+        with context.deferred_errors():
+            context.restore()
+            context.move_to(0, 0)
+            with context.deferred_errors():
+                context.line_to(1, 1)
+            inner_block_ended = True
+            context.stroke()
+            stroked = True
+    assert inner_block_ended
+    assert not stroked
+    context = Context(surface)
+    with pytest.raises(cairocffi.CairoError):
+        with context.deferred_errors():
+            with context.deferred_errors():
+                context.restore()
+            inner_block_ended = False
+            context.move_to(0, 0)
+            inner_block_ended = True
+    assert inner_block_ended
+
+    context = Context(surface)
+    with pytest.raises(cairocffi.CairoError):
+        with context.deferred_errors():
+            context.restore()
+    context = Context(surface)
+    with pytest.raises(ZeroDivisionError):
+        with context.deferred_errors():
+            context.restore()
+            1 / 0
+
+
+def test_context_record():
+    surface = ImageSurface(cairocffi.FORMAT_A8, 4, 4)
+    context = Context(surface)
+    with context.record() as display_list:
+        with context:
+            context.scale(2)
+            context.set_source_rgba(0, 0, 0, .5)
+            context.rectangle(0, 0, 1, 1)
+            assert context.get_matrix() == Matrix(2, 0, 0, 2, 0, 0)
+            context.fill()
+        with pytest.raises(ValueError):
+            context.pop_group()
+    assert len(display_list) == 6
+    assert context.pop_group.__self__ is context
+    assert surface.get_data()[:] == (
+        b'\x80\x80\x00\x00' * 2 + b'\x00\x00\x00\x00' * 2)
+
+    other_surface = ImageSurface(cairocffi.FORMAT_A8, 4, 4)
+    other_context = Context(other_surface, state_cache=True)
+    other_context.set_line_width(3)
+    display_list.replay(other_context)
+    assert other_context.get_matrix() == Matrix()
+    assert other_context.get_line_width() == 3
+    assert other_surface.get_data()[:] == surface.get_data()[:]
+
+    with other_context.record(display_list):
+        other_context.set_line_width(2)
+        with pytest.raises(ValueError):
+            with other_context.record():
+                pass
+    assert len(display_list) == 7
+    display_list.replay(context)
+    assert context.get_line_width() == 2
+    display_list.clear()
+    assert len(display_list) == 0
+    with pytest.raises(ValueError):
+        display_list.append('pop_group')
+    with pytest.raises(TypeError):
+        display_list.append('move_to', 1)
+
+
+def test_display_list_serialization():
+    image = ImageSurface(cairocffi.FORMAT_ARGB32, 2, 2)
+    image_context = Context(image)
+    image_context.set_source_rgb(0, 0, 1)
+    image_context.paint()
+    gradient = LinearGradient(0, 0, 20, 0)
+    gradient.add_color_stop_rgb(0, 1, 0, 0)
+    gradient.add_color_stop_rgba(1, 0, 1, 0, .5)
+
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 20, 20)
+    context = Context(surface)
+    with context.record() as display_list:
+        context.set_source(gradient)
+        context.rectangles([0, 0, 10, 10, 10, 10, 5, 5])
+        context.fill()
+        context.set_source_surface(image, 15, 0)
+        context.paint()
+        context.set_matrix(Matrix(xx=2, yy=2))
+        context.set_dash([1, .5], 1)
+        context.polyline([(0, 8), (9, 8)])
+        context.stroke()
+        context.select_font_face('monospace')
+        context.set_font_size(4)
+        context.move_to(0, 10)
+        context.show_text('é')
+        context.show_glyphs([(4, 5, 10)])
+        with pytest.raises(ValueError):
+            context.set_source(SurfacePattern(RecordingSurface(
+                cairocffi.CONTENT_COLOR, None)))
+    assert len(display_list) == 14
+
+    data = display_list.to_bytes()
+    for loaded in (DisplayList.from_bytes(data),
+                   pickle.loads(pickle.dumps(display_list))):
+        assert loaded.to_bytes() == data
+        other_surface = ImageSurface(cairocffi.FORMAT_ARGB32, 20, 20)
+        loaded.replay(Context(other_surface))
+        assert other_surface.get_data()[:] == surface.get_data()[:]
+
+    for invalid in (data[:-1], data + b'\0', b'CDL2' + data[4:], b''):
+        with pytest.raises(ValueError):
+            DisplayList.from_bytes(invalid)
+
+
+def test_display_list_iterators():
+    path = [
+        (cairocffi.PATH_MOVE_TO, (1, 2)),
+        (cairocffi.PATH_LINE_TO, (15, 12)),
+        (cairocffi.PATH_LINE_TO, (3, 18))]
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 20, 20)
+    context = Context(surface)
+    with context.record() as display_list:
+        context.append_path(
+            (path_type, points) for path_type, points in path)
+        assert context.copy_path() == path
+        context.stroke()
+    assert any(surface.get_data()[:])
+
+    other_surface = ImageSurface(cairocffi.FORMAT_ARGB32, 20, 20)
+    display_list.replay(Context(other_surface))
+    assert other_surface.get_data()[:] == surface.get_data()[:]
+
+
+def test_render_tiles():
+    def draw(context):
+        context.set_source_rgba(1, .5, 0, .8)
+        context.arc(30, 25, 20, 0, 2 * math.pi)
+        context.fill()
+        context.move_to(0, 0)
+        context.line_to(70, 50)
+        context.stroke()
+
+    recording = RecordingSurface(cairocffi.CONTENT_COLOR_ALPHA, None)
+    context = Context(recording)
+    with context.record() as display_list:
+        draw(context)
+
+    for format in (cairocffi.FORMAT_ARGB32, cairocffi.FORMAT_A8):
+        for source in (draw, display_list, recording):
+            tiled = ImageSurface(format, 70, 50)
+            render_tiles(tiled, source, tile_width=20, tile_height=16)
+            reference = ImageSurface(format, 70, 50)
+            draw(Context(reference))
+            assert tiled.get_data()[:] == reference.get_data()[:]
+
+    tiled = ImageSurface(cairocffi.FORMAT_ARGB32, 70, 50)
+    tiled.set_device_offset(5, 5)
+    render_tiles(tiled, draw, max_workers=2)
+    surface = ImageSurface(cairocffi.FORMAT_ARGB32, 70, 50)
+    surface.set_device_offset(5, 5)
+    draw(Context(surface))
+    assert tiled.get_data()[:] == surface.get_data()[:]
+
+    def fail(context):
+        raise ZeroDivisionError
+    with pytest.raises(ZeroDivisionError):
+        render_tiles(tiled, fail)
+    with pytest.raises(TypeError):
+        render_tiles(recording, draw)
+
+
 def test_context_fill():
     surface = ImageSurface(cairocffi.FORMAT_A8, 4, 4)
     assert surface.get_data()[:] == b'\x00' * 16
@@ -943,6 +1613,13 @@ def test_context_fill():
     assert context.in_fill(.8, 2) is False
     assert context.in_stroke(2, 2) is False
     assert context.in_stroke(.8, 2) is True
+    points = [(2, 2), (.8, 2), (4, 4)]
+    assert context.in_fill_many(points) == bytearray([1, 0, 0])
+    assert context.in_stroke_many(points) == bytearray([0, 1, 0])
+    assert context.in_fill_many(array.array('d', [2, 2])) == b'\x01'
+    assert context.in_fill_many([]) == b''
+    with pytest.raises(ValueError):
+        context.in_stroke_many([2, 2, 2])
     path = list(context.copy_path())
     assert path
     context.fill_preserve()
@@ -1017,6 +1694,7 @@ def test_context_in_clip():
     context.clip()
     assert context.in_clip(.5, 2) is False
     assert context.in_clip(1.5, 2) is True
+    assert context.in_clip_many([.5, 2, 1.5, 2]) == bytearray([0, 1])
 
 
 def test_context_mask():
@@ -1263,6 +1941,109 @@ def test_glyphs():
     assert glyph_pixels == text_pixels
 
 
+def test_text_extents_cache():
+    font = ScaledFont(
+        ToyFontFace('@cairo:serif'), text_extents_cache_size=2)
+    expected = ScaledFont(ToyFontFace('@cairo:serif')).text_extents('ab')
+    assert font.text_extents('ab') == expected
+    assert font.text_extents('ab') == expected
+    font.text_extents('cd')
+    font.text_extents('ef')
+    assert font.text_extents('ab') == expected
+    assert (
+        font.text_extents_cache_hits, font.text_extents_cache_misses) == (1, 4)
+    font.set_text_extents_cache_size(0)
+    assert font.text_extents('ab') == expected
+    assert (
+        font.text_extents_cache_hits, font.text_extents_cache_misses) == (1, 4)
+
+    context = Context(ImageSurface(cairocffi.FORMAT_ARGB32, 10, 10))
+    expected = context.text_extents('i' * 10)
+    context.set_text_extents_cache_size(10)
+    assert context.text_extents('i' * 10) == expected
+    assert context.text_extents('i' * 10) == expected
+    assert (
+        context.text_extents_cache_hits,
+        context.text_extents_cache_misses) == (1, 1)
+
+    # Changing the font or the matrix uses other entries
+    context.set_font_face(ToyFontFace('@cairo:monospace'))
+    assert context.text_extents('i' * 10)[4] > expected[4]
+    context.set_font_face(None)
+    context.set_font_size(20)
+    assert context.text_extents('i' * 10)[4] > expected[4]
+    context.set_font_size(10)
+    context.scale(2)
+    context.translate(5, 5)
+    context.text_extents('i' * 10)
+    assert (
+        context.text_extents_cache_hits,
+        context.text_extents_cache_misses) == (1, 4)
+    context.identity_matrix()
+    assert context.text_extents('i' * 10) == expected
+    assert (
+        context.text_extents_cache_hits,
+        context.text_extents_cache_misses) == (2, 4)
+    assert len(context._text_extents_fonts) == 4
+
+    context.set_text_extents_cache_size(1)
+    assert len(context._text_extents_fonts) == 1
+    context.set_text_extents_cache_size(0)
+    assert context.text_extents('i' * 10) == expected
+    assert (
+        context.text_extents_cache_hits,
+        context.text_extents_cache_misses) == (2, 4)
+
+
+def test_text_extents_many():
+    font = ScaledFont(ToyFontFace('@cairo:serif'))
+    texts = ['ab', 'Étt', b'i' * 10, '', 'a\0bc']
+    result = font.text_extents_many(texts)
+    assert len(result) == 6 * len(texts)
+    for i, text in enumerate(texts[:-1]):
+        assert round_tuple(result[6 * i:6 * i + 6]) == (
+            round_tuple(font.text_extents(text)))
+    assert round_tuple(result[-6:]) == round_tuple(font.text_extents('a'))
+    assert font.text_extents_many(iter(['ab', 'ab']))[6:] == result[:6]
+    assert len(font.text_extents_many([])) == 0
+
+
+def test_glyph_cache():
+    font = ScaledFont(ToyFontFace('@cairo:serif'), glyph_cache_size=2)
+    uncached = ScaledFont(ToyFontFace('@cairo:serif'))
+    for text, x, y in (('Étt', 5, 15), ('Étt', 0, 0), ('ab', 1, 2)):
+        for with_clusters in (True, False):
+            expected = uncached.text_to_glyphs(x, y, text, with_clusters)
+            cached = font.text_to_glyphs(x, y, text, with_clusters)
+            if with_clusters:
+                assert cached[1:] == expected[1:]
+                cached, expected = cached[0], expected[0]
+            assert len(cached) == len(expected)
+            for (index, glyph_x, glyph_y), expected_glyph in zip(
+                    cached, expected):
+                assert (index, round(glyph_x, 6), round(glyph_y, 6)) == (
+                    expected_glyph[0], round(expected_glyph[1], 6),
+                    round(expected_glyph[2], 6))
+    assert (font.glyph_cache_hits, font.glyph_cache_misses) == (2, 4)
+    assert (uncached.glyph_cache_hits, uncached.glyph_cache_misses) == (0, 0)
+
+    # Runs for 'Étt' are dropped, ('ab', False) is the least recently used
+    font.text_to_glyphs(0, 0, 'ab', True)
+    font.text_to_glyphs(0, 0, 'Étt', False)
+    assert (font.glyph_cache_hits, font.glyph_cache_misses) == (3, 5)
+    font.text_to_glyphs(0, 0, 'ab', True)
+    assert (font.glyph_cache_hits, font.glyph_cache_misses) == (4, 5)
+
+    # Returned lists are copies
+    glyphs = font.text_to_glyphs(0, 0, 'Étt', False)
+    glyphs.clear()
+    assert font.text_to_glyphs(0, 0, 'Étt', False)
+
+    font.set_glyph_cache_size(0)
+    font.text_to_glyphs(0, 0, 'Étt', False)
+    assert (font.glyph_cache_hits, font.glyph_cache_misses) == (6, 5)
+
+
 def test_from_null_pointer():
     for class_ in [Surface, Context, Pattern, FontFace, ScaledFont]:
         with pytest.raises(ValueError):
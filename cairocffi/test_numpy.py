@@ -15,3 +15,50 @@ def test_numpy():
     cr.set_line_width(3)
     cr.set_source_rgb(1.0, 0.0, 0.0)
     cr.stroke()
+
+
+def test_numpy_polyline():
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+    cr = cairo.Context(surface)
+    points = numpy.arange(8, dtype=numpy.float64).reshape((4, 2))
+    cr.polyline(points)
+    cr.lines_to(points[::-1])
+    path = cr.copy_path()
+    assert path[0] == (cairo.PATH_MOVE_TO, (0, 1))
+    assert [point for _, point in path] == (
+        [tuple(point) for point in points] +
+        [tuple(point) for point in points[::-1]])
+
+
+def test_numpy_append_path():
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+    cr = cairo.Context(surface)
+    types = numpy.array([cairo.PATH_MOVE_TO] + [cairo.PATH_LINE_TO] * 3)
+    coordinates = numpy.arange(8, dtype=numpy.float64)
+    cr.append_path((types, coordinates))
+    assert cr.copy_path() == [
+        (cairo.PATH_MOVE_TO, (0, 1)),
+        (cairo.PATH_LINE_TO, (2, 3)),
+        (cairo.PATH_LINE_TO, (4, 5)),
+        (cairo.PATH_LINE_TO, (6, 7))]
+
+
+def test_numpy_path_data():
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+    cr = cairo.Context(surface)
+    cr.rectangle(1, 2, 3, 4)
+    path = cr.copy_path(as_object=True)
+    points = numpy.frombuffer(path.data, dtype=numpy.float64).reshape((-1, 2))
+    assert tuple(points[1]) == (1, 2)
+    headers = numpy.frombuffer(path.data, dtype=numpy.int32).reshape((-1, 4))
+    assert tuple(headers[0, :2]) == (cairo.PATH_MOVE_TO, 2)
+
+
+def test_numpy_transform_points():
+    matrix = cairo.Matrix(2, 0, 0, 3, 12, 4)
+    points = numpy.array([[1, 2], [0, 0]], dtype=numpy.float64)
+    transformed = numpy.frombuffer(
+        matrix.transform_points(points)).reshape((-1, 2))
+    assert transformed.tolist() == [[14, 10], [12, 4]]
+    assert matrix.transform_distances(points, in_place=True) is points
+    assert points.tolist() == [[2, 6], [0, 0]]
@@ -26,6 +26,14 @@ JPEG_BYTES = zlib.decompress(base64.b64decode(
     b'+/YqX/O2gzdAUCUSoSJSitAUFiHdS1xArXBlr5qrf2wO58HkiigrlWK+T7TezChqU'))
 
 
+def test_preload():
+    pixbuf.preload()
+    assert pixbuf.gdk_pixbuf is not None
+    assert pixbuf.gobject is not None
+    with pytest.raises(AttributeError):
+        pixbuf.unknown
+
+
 def test_api():
     with pytest.raises(pixbuf.ImageLoadingError):
         pixbuf.decode_to_image_surface(b'')
@@ -0,0 +1,126 @@
+"""
+    cairocffi.tiles
+    ~~~~~~~~~~~~~~~
+
+    Render image surfaces by tiles, in parallel threads.
+
+    :copyright: Copyright 2013-2019 by Simon Sapin
+    :license: BSD, see LICENSE for details.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from math import ceil
+
+from . import cairo, ffi
+from .context import Context
+from .displaylist import DisplayList
+from .surfaces import ImageSurface, Surface
+
+# Tile widths are multiples of this number of pixels, so that tiles start at
+# 4-byte aligned addresses in the target's data for all formats
+TILE_WIDTH_ALIGNMENT = 32
+
+
+def _paint_surface(surface, context):
+    """Paint ``surface`` on ``context``."""
+    context.set_source_surface(surface)
+    context.paint()
+
+
+def render_tiles(target, draw, tile_width=256, tile_height=256,
+                 max_workers=None):
+    """Draw on an image surface by tiles, in parallel threads.
+
+    The target is split in tiles, and each tile is drawn in a thread of a
+    :class:`~concurrent.futures.ThreadPoolExecutor`, with its own
+    :class:`Context`. cairo doesn't hold Python's global interpreter lock,
+    so that tiles are rasterized in parallel on multiple cores.
+
+    Each tile is an image surface using a rectangle of the target's pixel
+    data, as a sub-surface created by :meth:`Surface.create_for_rectangle`,
+    but with no cairo state shared between threads. Tiles have the target's
+    device scale and offset: user space coordinates of new contexts are the
+    same on all tiles and on the target.
+
+    :param target:
+        The :class:`ImageSurface` to draw on.
+    :param draw:
+        What is drawn on each tile. It can be a callable, called in threads
+        with the :class:`Context` of a tile as its only argument,
+        that must not use objects shared between threads without locks.
+        It can also be a :class:`DisplayList` replayed on each tile,
+        or a :class:`Surface` (such as a :class:`RecordingSurface`)
+        painted on each tile.
+        As cairo builds the indices of recording surfaces lazily,
+        when they are painted for the first time,
+        the first tile is then painted alone
+        before painting the other tiles in parallel,
+        so that threads only read the shared surface.
+    :param tile_width:
+        Width of the tiles, in pixels,
+        rounded up to a multiple of 32 pixels.
+    :param tile_height: Height of the tiles, in pixels.
+    :param max_workers:
+        The maximum number of threads used,
+        as given to :class:`~concurrent.futures.ThreadPoolExecutor`.
+    :raises:
+        The first exception raised while drawing a tile,
+        after all tiles are drawn.
+
+    """
+    if not isinstance(target, ImageSurface):
+        raise TypeError('Expected an ImageSurface, got %r' % type(target))
+    paint_first_tile = False
+    if isinstance(draw, DisplayList):
+        draw = draw.replay
+    elif isinstance(draw, Surface):
+        draw = partial(_paint_surface, draw)
+        paint_first_tile = True
+
+    tile_width = max(ceil(tile_width / TILE_WIDTH_ALIGNMENT), 1) * (
+        TILE_WIDTH_ALIGNMENT)
+    tile_height = max(tile_height, 1)
+    width, height = target.get_width(), target.get_height()
+    format = target.get_format()
+    stride = target.get_stride()
+    bits_per_pixel = target.format_stride_for_width(
+        format, TILE_WIDTH_ALIGNMENT) * 8 // TILE_WIDTH_ALIGNMENT
+    scale = target.get_device_scale()
+    offset_x, offset_y = target.get_device_offset()
+
+    target.flush()
+    data = cairo.cairo_image_surface_get_data(target._pointer)
+    if data == ffi.NULL:
+        raise ValueError('The target surface is finished')
+
+    def render(tile):
+        x, y, tile_width, tile_height = tile
+        surface = Surface._from_pointer(
+            cairo.cairo_image_surface_create_for_data(
+                data + y * stride + x * bits_per_pixel // 8, format,
+                tile_width, tile_height, stride),
+            incref=False)
+        try:
+            surface.set_device_scale(*scale)
+            surface.set_device_offset(offset_x - x, offset_y - y)
+            draw(Context(surface))
+        finally:
+            surface.finish()
+
+    tiles = [
+        (x, y, min(tile_width, width - x), min(tile_height, height - y))
+        for y in range(0, height, tile_height)
+        for x in range(0, width, tile_width)]
+    try:
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = []
+            if paint_first_tile and tiles:
+                futures.append(executor.submit(render, tiles.pop(0)))
+                wait(futures)
+            futures.extend(executor.submit(render, tile) for tile in tiles)
+        for future in futures:
+            future.result()
+    finally:
+        target.mark_dirty()
@@ -8,11 +8,48 @@
     :license: BSD, see LICENSE for details.
 """
 
+from threading import Lock
+
+from cffi import FFI
 from xcffib import visualtype_to_c_struct
+from xcffib.ffi import ffi as xcffib_ffi
 
-from . import cairo, constants
+from . import CAIRO_FILENAMES, CAIRO_LIBRARY_NAMES, cairo, constants, dlopen, ffi
+from .ffi import cdef_backend, lib
 from .surfaces import SURFACE_TYPE_TO_CLASS, Surface
 
+# Compiled bindings don't include XCB declarations. XCB functions are then
+# loaded from cairo on first use, with their own ABI-mode FFI.
+xcb_ffi = xcb_cairo = None
+xcb_lock = Lock()
+
+
+def _load_xcb():
+    """Return a ``(ffi, library)`` tuple giving cairo's XCB functions.
+
+    Declarations are not parsed when the module is imported,
+    but when XCB surfaces are first created.
+
+    """
+    global xcb_ffi, xcb_cairo
+    if lib is None:
+        if not cdef_backend('xcb'):  # pragma: no cover
+            raise NotImplementedError(
+                'XCB declarations are not available in cairo bindings')
+        return ffi, cairo
+    with xcb_lock:  # pragma: no cover
+        if xcb_cairo is None:
+            new_ffi = FFI()
+            new_ffi.include(xcffib_ffi)
+            new_ffi.cdef("""
+                typedef struct _cairo_surface cairo_surface_t;
+                typedef struct _cairo_device cairo_device_t;
+            """)
+            new_ffi.cdef(constants._CAIRO_XCB_HEADERS)
+            xcb_cairo = dlopen(new_ffi, CAIRO_LIBRARY_NAMES, CAIRO_FILENAMES)
+            xcb_ffi = new_ffi
+        return xcb_ffi, xcb_cairo
+
 
 class XCBSurface(Surface):
     """The XCB surface is used to render cairo graphics to X Window System
@@ -32,11 +69,12 @@ class XCBSurface(Surface):
     :param height: integer
     """
     def __init__(self, conn, drawable, visual, width, height):
+        _, library = _load_xcb()
         c_visual = visualtype_to_c_struct(visual)
 
-        p = cairo.cairo_xcb_surface_create(
+        p = library.cairo_xcb_surface_create(
             conn._conn, drawable, c_visual, width, height)
-        Surface.__init__(self, p)
+        Surface.__init__(self, ffi.cast('cairo_surface_t *', p))
 
     def set_size(self, width, height):
         """
@@ -53,7 +91,9 @@ class XCBSurface(Surface):
         :param width: integer
         :param height: integer
         """
-        cairo.cairo_xcb_surface_set_size(self._pointer, width, height)
+        xcb_ffi, library = _load_xcb()
+        library.cairo_xcb_surface_set_size(
+            xcb_ffi.cast('cairo_surface_t *', self._pointer), width, height)
         self._check_status()
 
 
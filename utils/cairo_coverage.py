@@ -23,4 +23,6 @@ class Visitor(pycparser.c_ast.NodeVisitor):
 
 
 print('cairo functions never used in cairocffi:\n')
-Visitor().visit(pycparser.CParser().parse(cairocffi.constants._CAIRO_HEADERS))
+Visitor().visit(pycparser.CParser().parse(''.join(
+    getattr(cairocffi.constants, '_CAIRO_%sHEADERS' % name)
+    for name in ('', 'MESH_', 'REGION_', 'PDF_', 'PS_', 'SVG_'))))
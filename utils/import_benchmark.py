@@ -0,0 +1,48 @@
+"""Measure the time needed to parse cairo declarations and import cairocffi.
+
+Core declarations are always parsed when importing cairocffi,
+other declarations are only parsed when a backend is first used.
+
+"""
+
+import subprocess
+import sys
+import timeit
+
+import cffi
+
+import cairocffi
+from cairocffi.ffi import BACKEND_HEADERS
+
+REPEAT = 10
+
+
+def parse(*headers):
+    ffi = cffi.FFI()
+    for header in headers:
+        ffi.cdef(header)
+
+
+def main():
+    core = cairocffi.constants._CAIRO_HEADERS
+    backends = [
+        header for name, header in BACKEND_HEADERS.items() if name != 'xcb']
+    for name, headers in (('core', [core]), ('all', [core, *backends])):
+        seconds = min(timeit.repeat(
+            lambda: parse(*headers), number=1, repeat=REPEAT))
+        print('Parse %s declarations: %.1f ms' % (name, seconds * 1000))
+
+    for name, code in (
+            ('import cairocffi', 'import cairocffi'),
+            ('import and create an ImageSurface',
+             'import cairocffi; cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, 1, 1)'),
+            ('import and create a PDFSurface',
+             'import cairocffi; cairocffi.PDFSurface(None, 1, 1)')):
+        seconds = min(timeit.repeat(
+            lambda: subprocess.run((sys.executable, '-c', code), check=True),
+            number=1, repeat=REPEAT))
+        print('%s: %.1f ms' % (name.capitalize(), seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
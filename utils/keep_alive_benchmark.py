@@ -0,0 +1,41 @@
+"""Measure the time needed to create and destroy image surfaces over buffers.
+
+Surfaces created over Python buffers keep them alive until cairo destroys the
+surfaces, through a destroy function shared by all the surfaces. Set
+NUMBER to a few millions to stress it.
+
+"""
+
+import gc
+import sys
+import timeit
+from array import array
+
+import cairocffi
+from cairocffi.surfaces import KeepAlive
+
+NUMBER = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+REPEAT = 3
+
+
+def create(data):
+    surface = cairocffi.ImageSurface(
+        cairocffi.FORMAT_ARGB32, 16, 16, data=data, stride=64)
+    surface.set_mime_data('image/png', b'')
+    surface.finish()
+
+
+def main():
+    for name, data in (
+            ('bytearray', bytearray(64 * 16)),
+            ('array', array('B', bytes(64 * 16)))):
+        seconds = min(timeit.repeat(
+            lambda: create(data), number=NUMBER, repeat=REPEAT))
+        gc.collect()
+        print('Create and destroy %d surfaces over a %s: %.2f µs each' % (
+            NUMBER, name, seconds / NUMBER * 1e6))
+        assert not KeepAlive.instances, len(KeepAlive.instances)
+
+
+if __name__ == '__main__':
+    main()
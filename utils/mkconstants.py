@@ -53,32 +53,52 @@ def read_cairo_header(cairo_git_dir, suffix):
     return source
 
 
+def split_declarations(source, name):
+    """Split the declarations including ``name`` out of ``source``."""
+    kept, split = [], []
+    for declaration in source.split('\n\n'):
+        (split if name in declaration else kept).append(declaration)
+    return '\n\n'.join(kept), '\n%s\n\n' % '\n\n'.join(split)
+
+
 def generate(cairo_git_dir):
     # Remove comments, preprocessor instructions and macros.
     source = read_cairo_header(cairo_git_dir, '')
+    source, mesh_source = split_declarations(source, 'cairo_mesh_pattern_')
+    source, region_source = split_declarations(source, 'cairo_region')
 
-    source += 'const int CAIRO_PDF_OUTLINE_ROOT = 0;\n'
-    source += read_cairo_header(cairo_git_dir, '-pdf')
+    pdf_source = '\nconst int CAIRO_PDF_OUTLINE_ROOT = 0;\n'
+    pdf_source += read_cairo_header(cairo_git_dir, '-pdf')
 
-    source += read_cairo_header(cairo_git_dir, '-ps')
+    ps_source = read_cairo_header(cairo_git_dir, '-ps')
 
-    source += read_cairo_header(cairo_git_dir, '-svg')
+    svg_source = read_cairo_header(cairo_git_dir, '-svg')
 
-    source += '''
+    win32_source = '''
         typedef void* HDC;
         typedef void* HFONT;
         typedef void LOGFONTW;
     '''
-    source += read_cairo_header(cairo_git_dir, '-win32')
+    win32_source += read_cairo_header(cairo_git_dir, '-win32')
 
-    source += '''
+    quartz_source = '''
         typedef void* CGContextRef;
         typedef void* CGFontRef;
         typedef void* ATSUFontID;
     '''
-    source += read_cairo_header(cairo_git_dir, '-quartz')
-
-    ast = pycparser.CParser().parse(source)
+    quartz_source += read_cairo_header(cairo_git_dir, '-quartz')
+
+    headers = {
+        '_CAIRO_HEADERS': source,
+        '_CAIRO_MESH_HEADERS': mesh_source,
+        '_CAIRO_REGION_HEADERS': region_source,
+        '_CAIRO_PDF_HEADERS': pdf_source,
+        '_CAIRO_PS_HEADERS': ps_source,
+        '_CAIRO_SVG_HEADERS': svg_source,
+        '_CAIRO_WIN32_HEADERS': win32_source,
+        '_CAIRO_QUARTZ_HEADERS': quartz_source,
+    }
+    ast = pycparser.CParser().parse(''.join(headers.values()))
 
     print(textwrap.dedent('''\
         # *** Do not edit this file ***
@@ -88,7 +108,8 @@ def generate(cairo_git_dir):
         TAG_DEST = b"cairo.dest"
         TAG_LINK = b"Link"\n'''))
     PrintEnumsVisitor().visit(ast)
-    print('_CAIRO_HEADERS = r"""%s"""' % source)
+    for name, header in headers.items():
+        print('%s = r"""%s"""' % (name, header))
 
     source = read_cairo_header(cairo_git_dir, '-xcb')
     print('_CAIRO_XCB_HEADERS = r"""%s"""' % source)
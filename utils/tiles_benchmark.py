@@ -0,0 +1,87 @@
+"""Measure the time needed to render large images by tiles in threads.
+
+A map (many thin stroked lines and filled polygons) and a poster (large
+gradients, circles and text) are recorded in display lists, then replayed
+on one thread without tiles, and with render_tiles() and various numbers of
+threads. Display lists are replayed in C with compiled bindings, without
+holding the global interpreter lock.
+
+"""
+
+import math
+import os
+import random
+import timeit
+
+import cairocffi
+
+REPEAT = 3
+SIZE = 4000
+
+
+def draw_map(context):
+    shapes = random.Random(0)
+    context.set_source_rgb(.9, .9, .85)
+    context.paint()
+    for _ in range(2000):
+        context.move_to(shapes.uniform(0, SIZE), shapes.uniform(0, SIZE))
+        for _ in range(5):
+            context.rel_line_to(
+                shapes.uniform(-200, 200), shapes.uniform(-200, 200))
+        context.close_path()
+        context.set_source_rgba(
+            shapes.random(), shapes.random(), shapes.random(), .5)
+        context.fill()
+    context.set_source_rgb(.2, .2, .2)
+    context.set_line_width(1.5)
+    for _ in range(20000):
+        context.move_to(shapes.uniform(0, SIZE), shapes.uniform(0, SIZE))
+        context.rel_curve_to(
+            *(shapes.uniform(-100, 100) for _ in range(6)))
+    context.stroke()
+
+
+def draw_poster(context):
+    gradient = cairocffi.RadialGradient(
+        SIZE / 2, SIZE / 2, 0, SIZE / 2, SIZE / 2, SIZE)
+    gradient.add_color_stop_rgb(0, 1, .8, .2)
+    gradient.add_color_stop_rgb(1, .1, .2, .5)
+    context.set_source(gradient)
+    context.paint()
+    for i in range(200):
+        context.arc(
+            SIZE / 2, SIZE / 2, SIZE / 400 * i, 0, 2 * math.pi)
+        context.set_source_rgba(1, 1, 1, .05)
+        context.fill()
+    context.select_font_face('serif')
+    context.set_font_size(SIZE / 8)
+    context.set_source_rgb(0, 0, 0)
+    context.move_to(SIZE / 10, SIZE / 2)
+    context.show_text('cairocffi')
+
+
+def main():
+    cores = os.cpu_count() or 1
+    for name, draw in (('map', draw_map), ('poster', draw_poster)):
+        surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, SIZE, SIZE)
+        context = cairocffi.Context(surface)
+        with context.record() as display_list:
+            draw(context)
+        seconds = min(timeit.repeat(
+            lambda: display_list.replay(cairocffi.Context(surface)),
+            number=1, repeat=REPEAT))
+        print('Draw %s without tiles: %.0f ms' % (name, seconds * 1000))
+        workers = 1
+        while workers <= cores:
+            tiled_seconds = min(timeit.repeat(
+                lambda: cairocffi.render_tiles(
+                    surface, display_list, tile_width=512, tile_height=512,
+                    max_workers=workers),
+                number=1, repeat=REPEAT))
+            print('Draw %s by tiles with %d threads: %.0f ms (x%.1f)' % (
+                name, workers, tiled_seconds * 1000, seconds / tiled_seconds))
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()